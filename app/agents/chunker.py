@@ -0,0 +1,150 @@
+"""
+Token-budget-aware transcript chunker for map-reduce analysis
+"""
+import re
+
+# Rough chars-per-token for English BPE tokenizers (phi-2 / GPT-2 family)
+CHARS_PER_TOKEN = 4
+
+# Byte-level BPE has few merges for other scripts: Devanagari (3 UTF-8 bytes
+# per char) comes out at 2-3 tokens per char, so count those chars pessimistically
+NON_ASCII_TOKENS_PER_CHAR = 2.5
+
+# Transcript tokens per window. Small enough that CPU prefill stays cheap,
+# large enough that a window covers a few exchanges of the call.
+WINDOW_TOKENS = 384
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate that doesn't need the tokenizer loaded (script-aware)"""
+    # Non-ASCII chars here are mostly 3-byte (Devanagari), so 2 extra bytes each
+    non_ascii = (len(text.encode("utf-8")) - len(text)) // 2
+    return max(1, int((len(text) - non_ascii) / CHARS_PER_TOKEN + non_ascii * NON_ASCII_TOKENS_PER_CHAR))
+
+def truncate_tokens(text: str, max_tokens: int, count_tokens=estimate_tokens) -> str:
+    """Longest prefix of text within max_tokens (by the same estimate)"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+class WindowChunker:
+    """
+    Incremental chunk_transcript: feed transcript text as it arrives and get
+    back the windows that can no longer change
+
+    Only the new text is split, so a growing transcript costs O(n) in
+    total. feed() + finish() yields exactly chunk_transcript() of the
+    " "-joined texts.
+    """
+
+    def __init__(self, window_tokens: int = WINDOW_TOKENS, count_tokens=estimate_tokens):
+        self.window_tokens = window_tokens
+        self.count_tokens = count_tokens
+        self._tail = ""  # Last (possibly unfinished) sentence
+        self._current = []
+        self._current_tokens = 0
+
+    def feed(self, text: str) -> list:
+        """Add text (joined with a space); returns newly finished windows"""
+        text = text.strip()
+        if not text:
+            return []
+        sentences = _SENTENCE_END.split(f"{self._tail} {text}" if self._tail else text)
+        self._tail = sentences.pop()
+        return self._add(sentences)
+
+    def finish(self) -> list:
+        """Windows left once the transcript is complete"""
+        windows = self._add([self._tail] if self._tail else [])
+        self._tail = ""
+        if self._current:
+            windows.append(" ".join(self._current))
+            self._current, self._current_tokens = [], 0
+        return windows
+
+    def _add(self, sentences) -> list:
+        windows = []
+        for sentence in sentences:
+            pieces = [sentence]
+            if self.count_tokens(sentence) > self.window_tokens:
+                pieces = _split_words(sentence, self.window_tokens, self.count_tokens)
+
+            for piece in pieces:
+                tokens = self.count_tokens(piece) + 1  # + joining space
+                if self._current and self._current_tokens + tokens > self.window_tokens:
+                    windows.append(" ".join(self._current))
+                    self._current, self._current_tokens = [], 0
+                self._current.append(piece)
+                self._current_tokens += tokens
+        return windows
+
+def chunk_transcript(transcript: str, window_tokens: int = WINDOW_TOKENS, count_tokens=estimate_tokens) -> list:
+    """
+    Split a transcript into windows of at most window_tokens
+
+    Windows break at sentence ends; a sentence longer than a whole window
+    is split at word boundaries. Greedy from the start, so the windows of
+    a growing transcript stay the same except for the last one.
+
+    Args:
+        transcript: Full cleaned transcript
+        window_tokens: Token budget per window
+        count_tokens: Token counter (estimate by default, or a real tokenizer)
+
+    Returns:
+        List of window strings in call order
+    """
+    chunker = WindowChunker(window_tokens, count_tokens)
+    return chunker.feed(transcript or "") + chunker.finish()
+
+def _split_words(sentence, window_tokens, count_tokens):
+    pieces = []
+    current = []
+    current_tokens = 0
+    for word in sentence.split():
+        tokens = count_tokens(word) + 1
+        if current and current_tokens + tokens > window_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def select_windows(windows: list, max_windows: int) -> list:
+    """
+    Keep at most max_windows, spread evenly over the call
+
+    Used to enforce the per-call token cap without dropping the end of
+    long calls (where objections and next steps usually are).
+    """
+    return [windows[i] for i in select_indices(len(windows), max_windows)]
+
+def select_indices(count: int, max_windows: int) -> list:
+    """Indices select_windows keeps out of count windows"""
+    if max_windows <= 0 or count <= max_windows:
+        return list(range(count))
+    if max_windows == 1:
+        return [0]
+    step = (count - 1) / (max_windows - 1)
+    return [round(i * step) for i in range(max_windows)]
+
+def unique(items) -> list:
+    """Order-preserving, case-insensitive de-duplication for the reduce step"""
+    seen = set()
+    out = []
+    for item in items:
+        key = str(item).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            out.append(item)
+    return out
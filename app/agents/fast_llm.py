@@ -1,69 +1,634 @@
 """
 Fast LLM engine - Fixed version
+
+torch/transformers are imported inside the methods that need them so
+importing this module stays cheap for the UI.
 """
-from transformers import pipeline
-import torch
 from time import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager
+import contextvars
+import copy
+import os
+import queue
+import threading
 import warnings
+from app.utils.model_client import RemoteLLM, server_url
+from app.utils import tracing
 warnings.filterwarnings("ignore")
 
+DEFAULT_MODEL = "microsoft/phi-2"
+FALLBACK_MODEL = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+
+# Weight precision: fp32, bf16 (needs CPU bf16 support), int8 (dynamic
+# quantization of Linear layers) or auto (bf16 if supported, else fp32)
+PRECISIONS = ("fp32", "bf16", "int8", "auto")
+PRECISION = os.environ.get("LLM_PRECISION", "fp32")
+
+# Request batching: prompts arriving within MAX_WAIT of each other share one generate()
+MAX_BATCH = int(os.environ.get("LLM_MAX_BATCH", "8"))
+MAX_WAIT_SECONDS = float(os.environ.get("LLM_MAX_WAIT_MS", "10")) / 1000
+
+# How often a caller waiting on the scheduler checks for cancellation
+CANCEL_POLL_SECONDS = 0.1
+
+# Cancellation check (no-arg callable) for LLM calls made in this context
+_should_cancel = contextvars.ContextVar("llm_should_cancel", default=None)
+
+# time() by which LLM calls in this context are given up (sent to the model server)
+_deadline = contextvars.ContextVar("llm_deadline", default=None)
+
+class Cancelled(Exception):
+    """The caller gave up (e.g. its deadline passed); its LLM work was dropped"""
+
+@contextmanager
+def cancel_scope(should_cancel, deadline: float = None):
+    """
+    Make LLM calls in this context cancellable
+    
+    Queued prompts are dropped, waiting callers raise Cancelled and running
+    generations stop at the next token once should_cancel() returns True.
+    A model server can't see should_cancel, so remote calls are sent with
+    the time left until deadline (a time() value) and stop there instead.
+    """
+    token = _should_cancel.set(should_cancel)
+    deadline_token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(deadline_token)
+        _should_cancel.reset(token)
+
+def _raise_if_cancelled():
+    should_cancel = _should_cancel.get()
+    if should_cancel is not None and should_cancel():
+        raise Cancelled()
+
+@contextmanager
+def _generating():
+    """
+    Hold the model for one generation; a caller cancelled while waiting
+    for it gives up instead of queueing behind the running generation
+    """
+    while not _generate_lock.acquire(timeout=CANCEL_POLL_SECONDS):
+        _raise_if_cancelled()
+    try:
+        _raise_if_cancelled()
+        yield
+    finally:
+        _generate_lock.release()
+
+def _remote(method: str, *args):
+    """Call the model server within this context's deadline"""
+    _raise_if_cancelled()
+    deadline = _deadline.get()
+    try:
+        return getattr(get_llm(), method)(*args, deadline=deadline)
+    except Exception:
+        # Timed out, or the server stopped at the deadline - not a real error
+        if deadline is not None and time() >= deadline:
+            raise Cancelled()
+        _raise_if_cancelled()
+        raise
+
+def bf16_supported() -> bool:
+    """True if the CPU has native bf16 instructions (AVX512-BF16 or AMX)"""
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+def resolve_precision(precision: str, warn: bool = True) -> str:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown LLM precision {precision!r}, expected one of {PRECISIONS}")
+    if precision == "auto":
+        return "bf16" if bf16_supported() else "fp32"
+    if warn and precision == "bf16" and not bf16_supported():
+        print("⚠️ CPU has no native bf16 support, bf16 will be slow")
+    return precision
+
+# Model + precision expected to load (part of the result cache key; "auto"
+# is resolved). llm_version() reports what actually loaded, e.g. after the
+# TinyLlama fallback.
+LLM_VERSION = f"{DEFAULT_MODEL}/{resolve_precision(PRECISION, warn=False)}"
+
 class FastLLM:
     """Simple LLM that works"""
     
-    def __init__(self, model_name="microsoft/phi-2"):
+    def __init__(self, model_name=DEFAULT_MODEL, max_cached_prefixes=4, precision=PRECISION):
         self.model_name = model_name
-        print(f"🤖 Loading {model_name}...")
+        self.max_cached_prefixes = max_cached_prefixes
+        self.precision = resolve_precision(precision)
+        self._prefix_cache = OrderedDict()  # prefix text -> (input_ids, past_key_values)
+        print(f"🤖 Loading {model_name} ({self.precision})...")
         self._load_model()
         print("✅ Model loaded")
     
     def _load_model(self):
         """Load model - simple version"""
         try:
-            # Use simple pipeline without complex options
-            self.pipe = pipeline(
-                "text-generation",
-                model=self.model_name,
-                device="cpu",
-                torch_dtype=torch.float32
-            )
+            self.pipe = self._load_pipeline(self.model_name)
+            self.loaded_model = self.model_name
         except Exception as e:
             print(f"❌ Error: {e}")
             # Fallback to tiny model
             print("🔄 Trying TinyLlama...")
-            self.pipe = pipeline(
-                "text-generation",
-                model="TinyLlama/TinyLlama-1.1B-Chat-v1.0",
-                device="cpu"
+            self.pipe = self._load_pipeline(FALLBACK_MODEL)
+            self.loaded_model = FALLBACK_MODEL
+    
+    @property
+    def version(self) -> str:
+        """Loaded model + precision (LLM_VERSION's format)"""
+        return f"{self.loaded_model}/{self.precision}"
+    
+    def _load_pipeline(self, model_name: str):
+        """Text-generation pipeline in the configured precision"""
+        import torch
+        from transformers import pipeline
+        
+        pipe = pipeline(
+            "text-generation",
+            model=model_name,
+            device="cpu",
+            torch_dtype=torch.bfloat16 if self.precision == "bf16" else torch.float32,
+            # Load weights straight into the final tensors instead of init + copy
+            model_kwargs={"low_cpu_mem_usage": True}
+        )
+        
+        if self.precision == "int8":
+            # In place: swaps each Linear for its int8 version one at a time
+            # instead of deep-copying the whole fp32 model first (2x peak RAM)
+            torch.ao.quantization.quantize_dynamic(
+                pipe.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
             )
+        return pipe
     
-    def generate(self, prompt: str, max_tokens=150) -> str:
-        """Generate response"""
+    def generate(self, prompt: str, max_tokens=150, stop=None, fields=None) -> str:
+        """
+        Generate response
+        
+        stop: strings that end the response (not included in it)
+        fields: labels such as "Summary"; the prompt is ended with the first
+            label, and generation ends once the other labels have been
+            written and the last one's line is finished. The response
+            starts with the first label.
+        """
+        rule = StopRule(stop, fields)
         try:
+            start, timer = time(), {}
+            tokenizer = self.pipe.tokenizer
+            prompt = rule.prompt(prompt)
+            prompt_len = len(tokenizer(prompt)["input_ids"])
+            
             result = self.pipe(
                 prompt,
                 max_new_tokens=max_tokens,
                 temperature=0.1,
-                do_sample=False
+                do_sample=False,
+                stopping_criteria=_stopping_criteria(tokenizer, prompt_len, [rule], [max_tokens], timer)
             )[0]['generated_text']
             
             # Remove prompt from response
             if result.startswith(prompt):
                 result = result[len(prompt):].strip()
             
-            return result
+            _record_generation(start, timer, prompt_len, len(tokenizer(result, add_special_tokens=False)["input_ids"]))
+            return rule.apply(result)
             
         except Exception as e:
             print(f"❌ Generation error: {e}")
             return "Analysis completed successfully."
+    
+    def generate_batch(self, prompts, max_tokens=150, stop=None, fields=None) -> list:
+        """
+        Generate responses for several prompts in one padded batch
+        
+        Args:
+            prompts: List of prompts
+            max_tokens: One limit for all prompts, or a list with one per prompt
+            stop, fields: As in generate(); one value for all prompts or a list per prompt
+            
+        Returns:
+            List of responses in prompt order
+        """
+        if not prompts:
+            return []
+        max_tokens = _per_prompt(max_tokens, len(prompts))
+        rules = [StopRule(s, f) for s, f in zip(_per_prompt(stop, len(prompts)), _per_prompt(fields, len(prompts)))]
+        
+        try:
+            import torch
+            tokenizer = self.pipe.tokenizer
+            model = self.pipe.model
+            
+            # Decoder-only models need left padding so every prompt ends at the same position
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            tokenizer.padding_side = "left"
+            
+            start, timer = time(), {}
+            inputs = tokenizer([rule.prompt(p) for p, rule in zip(prompts, rules)], return_tensors="pt", padding=True)
+            prompt_len = inputs["input_ids"].shape[1]
+            with torch.no_grad():
+                output = model.generate(
+                    **inputs,
+                    max_new_tokens=max(max_tokens),
+                    do_sample=False,
+                    pad_token_id=tokenizer.pad_token_id,
+                    stopping_criteria=_stopping_criteria(tokenizer, prompt_len, rules, max_tokens, timer)
+                )
+            _record_generation(
+                start, timer, int(inputs["attention_mask"].sum()),
+                _generated_tokens(output[:, prompt_len:], tokenizer.pad_token_id), batch=len(prompts)
+            )
+            
+            # Keep only the new tokens, cut to each prompt's own limit and stop rule
+            return [
+                rule.apply(tokenizer.decode(row[prompt_len:prompt_len + limit], skip_special_tokens=True).strip())
+                for row, limit, rule in zip(output, max_tokens, rules)
+            ]
+            
+        except Exception as e:
+            print(f"❌ Batch generation error: {e}")
+            return [self.generate(p, m, r.stop, r.fields) for p, m, r in zip(prompts, max_tokens, rules)]
+
+    def _get_prefix_state(self, prefix: str):
+        """Prefill the prefix once and keep its past-key-values (small LRU)"""
+        import torch
+        
+        state = self._prefix_cache.get(prefix)
+        if state is not None:
+            self._prefix_cache.move_to_end(prefix)
+            return state
+        
+        tokenizer = self.pipe.tokenizer
+        model = self.pipe.model
+        prefix_ids = tokenizer(prefix, return_tensors="pt")["input_ids"]
+        with torch.no_grad(), tracing.span("llm.prefill", prompt_tokens=prefix_ids.shape[1], cached_prefix=True):
+            past = model(prefix_ids, use_cache=True).past_key_values
+        
+        state = (prefix_ids, past)
+        self._prefix_cache[prefix] = state
+        while len(self._prefix_cache) > self.max_cached_prefixes:
+            self._prefix_cache.popitem(last=False)
+        return state
+    
+    def generate_with_prefix(self, prefix: str, suffixes, max_tokens=150, stop=None, fields=None) -> list:
+        """
+        Generate one response per suffix, reusing the prefix's KV cache
+        
+        Args:
+            prefix: Text shared by every prompt (e.g. the transcript block)
+            suffixes: Per-prompt instructions appended after the prefix
+            max_tokens: One limit for all prompts, or a list with one per prompt
+            stop, fields: As in generate(); one value for all prompts or a list per prompt
+            
+        Returns:
+            List of responses in suffix order
+        """
+        if not suffixes:
+            return []
+        max_tokens = _per_prompt(max_tokens, len(suffixes))
+        rules = [StopRule(s, f) for s, f in zip(_per_prompt(stop, len(suffixes)), _per_prompt(fields, len(suffixes)))]
+        
+        try:
+            import torch
+            tokenizer = self.pipe.tokenizer
+            model = self.pipe.model
+            prefix_ids, past = self._get_prefix_state(prefix)
+            # generate() extends the cache in place. A DynamicCache is cropped back
+            # to the prefix after each suffix; legacy tuple caches (older
+            # transformers) have to be copied per suffix instead.
+            croppable = hasattr(past, "crop")
+            pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+            
+            results = []
+            for suffix, limit, rule in zip(suffixes, max_tokens, rules):
+                # Tokenize separately so the prefix tokens match the cached ones exactly
+                suffix_ids = tokenizer(rule.prompt(suffix), return_tensors="pt", add_special_tokens=False)["input_ids"]
+                input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+                prompt_len = input_ids.shape[1]
+                start, timer = time(), {}
+                
+                try:
+                    with torch.no_grad():
+                        output = model.generate(
+                            input_ids=input_ids,
+                            attention_mask=torch.ones_like(input_ids),
+                            past_key_values=past if croppable else copy.deepcopy(past),
+                            max_new_tokens=limit,
+                            do_sample=False,
+                            pad_token_id=pad_id,
+                            stopping_criteria=_stopping_criteria(tokenizer, prompt_len, [rule], [limit], timer)
+                        )
+                finally:
+                    if croppable:
+                        past.crop(prefix_ids.shape[1])
+                # Only the suffix is prefilled here; the prefix came from the cache
+                _record_generation(start, timer, suffix_ids.shape[1], _generated_tokens(output[:, prompt_len:], pad_id))
+                results.append(
+                    rule.apply(tokenizer.decode(output[0, prompt_len:], skip_special_tokens=True).strip())
+                )
+            return results
+            
+        except Exception as e:
+            print(f"❌ Prefix generation error: {e}")
+            return [
+                self.generate(prefix + suffix, m, r.stop, r.fields)
+                for suffix, m, r in zip(suffixes, max_tokens, rules)
+            ]
+    
+    def generate_fields(self, prompt: str, fields: dict) -> str:
+        """
+        Constrained generation: write each field label, let the model fill in
+        only that line, then move on to the next label
+        
+        Args:
+            prompt: Prompt the fields are answered after
+            fields: {label: max tokens for its value} in output order
+            
+        Returns:
+            "Label: value" lines, one per field (every field is always present)
+        """
+        prefix = prompt.rstrip() + "\n"
+        lines = []
+        for label, limit in fields.items():
+            # The prompt is prefilled once; only the growing answer is re-encoded
+            _raise_if_cancelled()
+            suffix = "".join(line + "\n" for line in lines) + f"{label}:"
+            value = self.generate_with_prefix(prefix, [suffix], limit, stop=["\n"])[0]
+            lines.append(f"{label}: {value.strip()}")
+        return "\n".join(lines)
+
+class StopRule:
+    """
+    When a generation is finished, and where to cut its text
+    
+    With fields, the prompt ends on the first label (prompt templates
+    already list the labels, so the model wouldn't write them again) and
+    only the remaining labels have to appear in the generated text.
+    """
+    
+    def __init__(self, stop=None, fields=None):
+        self.stop = [s for s in (stop or []) if s]
+        self.fields = list(fields or [])
+        self.seed = f"{self.fields[0]}:" if self.fields else ""
+        self._labels = [f.lower() + ":" for f in self.fields[1:]]
+    
+    def __bool__(self):
+        return bool(self.stop or self.fields)
+    
+    def prompt(self, prompt: str) -> str:
+        """Prompt to generate from (ends with the first field label)"""
+        return f"{prompt.rstrip()}\n{self.seed}" if self.seed else prompt
+    
+    def cut(self, text: str):
+        """Index to cut text at once the rule is met, else None"""
+        cuts = [i for i in (text.find(s) for s in self.stop) if i >= 0]
+        if self.fields:
+            lower = text.lower()
+            positions = [lower.rfind(label) for label in self._labels]
+            if not positions or min(positions) >= 0:
+                # Every field written; done when the last one's line ends
+                # (the first field's line starts the text)
+                end = text.find("\n", max(positions, default=0))
+                if end > 0:
+                    cuts.append(end)
+        return min(cuts) if cuts else None
+    
+    def apply(self, text: str) -> str:
+        """Cut text and put the first field label back in front of it"""
+        cut = self.cut(text)
+        text = text if cut is None else text[:cut].strip()
+        return f"{self.seed} {text}" if self.seed else text
+
+def _stopping_criteria(tokenizer, prompt_len: int, rules: list, limits: list, timer: dict = None):
+    """
+    StoppingCriteriaList that ends generate() once every row is finished
+    
+    timer (if given) gets "first_token": the time the first new token was
+    produced, which splits prefill from decode time.
+    """
+    from transformers import StoppingCriteria, StoppingCriteriaList
+    
+    criteria = []
+    should_cancel = _should_cancel.get()
+    if should_cancel is not None:
+        class _Cancelled(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return should_cancel()
+        
+        criteria.append(_Cancelled())
+    
+    if timer is not None:
+        class _FirstToken(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                timer.setdefault("first_token", time())
+                return False
+        
+        criteria.append(_FirstToken())
+    
+    if not any(rules):
+        return StoppingCriteriaList(criteria)
+    
+    class _RulesMet(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            new_tokens = input_ids.shape[1] - prompt_len
+            # Rows without a rule only finish at their own token limit
+            return all(
+                new_tokens >= limit
+                or (rule and rule.cut(tokenizer.decode(row[prompt_len:], skip_special_tokens=True)) is not None)
+                for row, rule, limit in zip(input_ids, rules, limits)
+            )
+    
+    return StoppingCriteriaList(criteria + [_RulesMet()])
+
+def _record_generation(start: float, timer: dict, prompt_tokens: int, new_tokens: int, **attrs):
+    """Record prefill (up to the first new token) and decode spans for one generate()"""
+    end = time()
+    first = timer.get("first_token", end)
+    decode = end - first
+    tracing.record("llm.prefill", first - start, prompt_tokens=prompt_tokens, **attrs)
+    tracing.record(
+        "llm.decode", decode, new_tokens=new_tokens,
+        tokens_per_s=round(new_tokens / decode, 2) if decode > 0 else None, **attrs
+    )
+
+def _generated_tokens(new_ids, pad_id) -> int:
+    """New tokens actually generated: rows that hit EOS early are padded to the longest row"""
+    return int((new_ids != pad_id).sum()) if pad_id is not None else new_ids.numel()
+
+def _per_prompt(value, count: int) -> list:
+    """Expand a shared setting (int, None or list of strings) to one per prompt"""
+    if value is None or isinstance(value, int) or not value or isinstance(value[0], str):
+        return [value] * count
+    return list(value)
+
+class BatchScheduler:
+    """
+    Collect concurrent prompts and run them as one batched generation
+    
+    The worker thread takes the first waiting prompt, then keeps collecting
+    for up to max_wait seconds (or until max_batch prompts) before calling
+    generate_batch. A lone prompt goes through plain generate, so a single
+    user only pays the max_wait delay.
+    """
+    
+    def __init__(self, get_engine, max_batch=MAX_BATCH, max_wait=MAX_WAIT_SECONDS):
+        self.get_engine = get_engine
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.batches = 0
+        self.prompts = 0
+        self.busy_seconds = 0.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._work, name="llm-scheduler", daemon=True)
+        self._thread.start()
+    
+    def submit(self, prompt: str, max_tokens=150, stop=None, fields=None) -> Future:
+        """Queue one prompt; the future resolves to its response"""
+        future = Future()
+        future.submitted = time()
+        future.trace = tracing.current()  # The worker thread records spans for the caller
+        future.should_cancel = _should_cancel.get()
+        self._queue.put((future, prompt, max_tokens, stop, fields))
+        return future
+    
+    def _collect(self) -> list:
+        jobs = [self._queue.get()]
+        deadline = time() + self.max_wait
+        while len(jobs) < self.max_batch:
+            remaining = deadline - time()
+            try:
+                jobs.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for job in jobs:
+            if job[0].should_cancel is not None and job[0].should_cancel():
+                job[0].cancel()  # The caller gave up while it was queued
+        return [job for job in jobs if job[0].set_running_or_notify_cancel()]
+    
+    def _work(self):
+        while True:
+            jobs = self._collect()
+            if not jobs:
+                continue
+            
+            start = time()
+            for job in jobs:
+                tracing.record("llm.queue_wait", start - job[0].submitted, batch=len(jobs), **job[0].trace)
+            # Batches usually hold one call's prompts; tag spans with it when they do
+            call_ids = {job[0].trace["call_id"] for job in jobs}
+            parents = {job[0].trace["parent"] for job in jobs}
+            # A batch stops early only once every prompt in it was cancelled
+            checks = [job[0].should_cancel for job in jobs]
+            should_cancel = (lambda: all(check() for check in checks)) if all(checks) else None
+            try:
+                with _generate_lock, cancel_scope(should_cancel), tracing.call_context(
+                    call_ids.pop() if len(call_ids) == 1 else None,
+                    parents.pop() if len(parents) == 1 else None
+                ):
+                    engine = self.get_engine()
+                    if len(jobs) == 1:
+                        results = [engine.generate(*jobs[0][1:])]
+                    else:
+                        prompts, limits, stops, fields = (list(column) for column in zip(*(j[1:] for j in jobs)))
+                        results = engine.generate_batch(prompts, limits, stops, fields)
+            except Exception as e:
+                for job in jobs:
+                    job[0].set_exception(e)
+                continue
+            finally:
+                self.busy_seconds += time() - start
+            
+            self.batches += 1
+            self.prompts += len(jobs)
+            for job, result in zip(jobs, results):
+                job[0].set_result(result)
+    
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "prompts": self.prompts,
+            "avg_batch": self.prompts / self.batches if self.batches else 0.0,
+            "busy_seconds": self.busy_seconds,
+        }
 
 # Global instance
 _llm_instance = None
+_llm_lock = threading.Lock()  # Warm-up thread and requests must not load twice
+_generate_lock = threading.Lock()  # One generation on the model at a time
+_scheduler = None
+_scheduler_lock = threading.Lock()
 
 def get_llm():
     global _llm_instance
-    if _llm_instance is None:
-        _llm_instance = FastLLM()
-    return _llm_instance
+    if server_url():
+        return RemoteLLM()
+    with _llm_lock:
+        if _llm_instance is None:
+            with tracing.span("llm.load", model=DEFAULT_MODEL, precision=PRECISION) as attrs:
+                _llm_instance = FastLLM()
+                attrs["version"] = _llm_instance.version
+        return _llm_instance
+
+def llm_version() -> str:
+    """Model + precision actually loaded in this process (LLM_VERSION until it is)"""
+    return _llm_instance.version if _llm_instance is not None else LLM_VERSION
+
+def get_scheduler() -> BatchScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BatchScheduler(get_llm)
+        return _scheduler
+
+def _results(futures: list) -> list:
+    """Wait for scheduler futures, giving up (and dropping queued ones) on cancellation"""
+    should_cancel = _should_cancel.get()
+    if should_cancel is None:
+        return [f.result() for f in futures]
+    
+    pending = set(futures)
+    while pending:
+        if should_cancel():
+            for f in pending:
+                f.cancel()
+            raise Cancelled()
+        _done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+    _raise_if_cancelled()  # Dropped or cut short while we waited
+    return [f.result() for f in futures]
+
+def run_llm(prompt: str, max_tokens=150, stop=None, fields=None):
+    if server_url():
+        return _remote("generate", prompt, max_tokens, stop, fields)
+    return _results([get_scheduler().submit(prompt, max_tokens, stop, fields)])[0]
+
+def run_llm_batch(prompts, max_tokens=150, stop=None, fields=None):
+    if server_url():
+        return _remote("generate_batch", prompts, max_tokens, stop, fields)
+    settings = zip(
+        _per_prompt(max_tokens, len(prompts)), _per_prompt(stop, len(prompts)), _per_prompt(fields, len(prompts))
+    )
+    # Submitted one by one so prompts from concurrent callers can share a batch
+    futures = [get_scheduler().submit(p, *setting) for p, setting in zip(prompts, settings)]
+    return _results(futures)
+
+def run_llm_with_prefix(prefix, suffixes, max_tokens=150, stop=None, fields=None):
+    if server_url():
+        return _remote("generate_with_prefix", prefix, suffixes, max_tokens, stop, fields)
+    with _generating():
+        responses = get_llm().generate_with_prefix(prefix, suffixes, max_tokens, stop, fields)
+    _raise_if_cancelled()  # Cut short by cancellation - not a real answer
+    return responses
 
-def run_llm(prompt: str, max_tokens=150):
-    return get_llm().generate(prompt, max_tokens)
\ No newline at end of file
+def run_llm_fields(prompt: str, fields: dict):
+    if server_url():
+        return _remote("generate_fields", prompt, fields)
+    with _generating():
+        response = get_llm().generate_fields(prompt, fields)
+    _raise_if_cancelled()
+    return response
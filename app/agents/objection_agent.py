@@ -1,44 +1,139 @@
 """
 Simple objection agent
 """
-from app.agents.fast_llm import run_llm
+import re
+from functools import lru_cache
+from app.agents.chunker import unique
+from app.agents.fast_llm import run_llm_fields
+from app.agents.objection_index import BETTER_RESPONSES, context_spans, get_index, quote_around
+from app.agents.prompts import CUSTOMER, shared_prefix, speaker_spans, speaker_text
 
-def objection_agent(transcript: str) -> dict:
-    """Simple objection analysis"""
-    short = transcript[:300]
-    
-    prompt = f"""Find objections in sales call:
+MAX_TOKENS = 80
 
-{short}
+INSTRUCTION = """Find objections in this sales call.
 
 Answer: Found [0-2] objections. Main issue: [brief]"""
 
+# Output fields in order -> max tokens for each value (the objections
+# themselves come from the keyword index)
+FIELDS = {
+    "Main issue": 40,
+}
+
+# Default advice when no objection was raised
+DEFAULT_RECOMMENDATIONS = ["Always ask about budget and timeline"]
+
+# Max objections reported per window
+MAX_OBJECTIONS = 5
+
+@lru_cache(maxsize=64)
+def _customer_hits(transcript: str) -> tuple:
+    """
+    (customer text, keyword hits) of a window - needs_llm, context and
+    parse_response all see the same window, so it is scanned once
+    """
+    text = speaker_text(transcript, CUSTOMER)
+    return text, tuple(get_index().find(text))
+
+def needs_llm(transcript: str) -> bool:
+    """Only spend an LLM pass on customer text that contains an objection phrase"""
+    return bool(_customer_hits(transcript)[1])
+
+def context(transcript: str) -> str:
+    """Transcript text the agent reads - only the customer's text around keyword hits"""
+    transcript, hits = _customer_hits(transcript)
+    excerpts = " ... ".join(transcript[start:end] for start, end in context_spans(transcript, hits))
+    return excerpts or transcript
+
+def build_prompt(transcript: str) -> str:
+    """Prompt for the objection pass"""
+    return shared_prefix(context(transcript)) + INSTRUCTION
+
+def parse_response(response: str, transcript: str = "") -> dict:
+    """Combine keyword hits in the customer's turns with the LLM's main-issue summary"""
+    transcript, hits = _customer_hits(transcript)
+    objections = []
+    seen = set()
+    for hit in hits:
+        quote = quote_around(transcript, hit)
+        if (hit["type"], quote) in seen:
+            continue
+        seen.add((hit["type"], quote))
+        objections.append({
+            "type": hit["type"],
+            "customer_quote": quote,
+            "better_response": BETTER_RESPONSES.get(hit["type"], "Acknowledge and ask a clarifying question")
+        })
+        if len(objections) >= MAX_OBJECTIONS:
+            break
+    
+    result = {
+        "objections_found": len(objections),
+        "objections": objections,
+        "recommendations": unique(o["better_response"] for o in objections) or list(DEFAULT_RECOMMENDATIONS),
+        "raw": response,
+        "llm_skipped": not response
+    }
+    
+    match = re.search(r"Main issue:\s*(.+)", response)
+    if match and not match.group(1).startswith("["):
+        result["main_issue"] = match.group(1).strip()
+    
+    return result
+
+def merge_results(results: list) -> dict:
+    """Reduce per-window objections into one list for the whole call"""
+    if len(results) == 1:
+        return results[0]
+    
+    objections = []
+    seen = set()
+    for r in results:
+        for obj in r["objections"]:
+            key = (obj.get("type"), obj.get("customer_quote"))
+            if key not in seen:
+                seen.add(key)
+                objections.append(obj)
+    
+    merged = {
+        "objections_found": len(objections),
+        "objections": objections,
+        "recommendations": unique(o["better_response"] for o in objections) or list(DEFAULT_RECOMMENDATIONS),
+        "raw": "\n---\n".join(r.get("raw", "") for r in results if r.get("raw")),
+        "llm_skipped": all(r.get("llm_skipped", False) for r in results)
+    }
+    issues = unique(r["main_issue"] for r in results if r.get("main_issue"))
+    if issues:
+        merged["main_issue"] = "; ".join(issues)
+    return merged
+
+def finalize(result: dict, transcript: str) -> dict:
+    """Attach keyword hits (customer turns only) with offsets into the full transcript"""
+    matches = get_index().find(transcript)
+    spans = speaker_spans(transcript, CUSTOMER)
+    if spans is not None:
+        matches = [m for m in matches if any(start <= m["start"] < end for start, end in spans)]
+    result["matches"] = matches
+    return result
+
+def fallback_result(error: str) -> dict:
+    return {
+        "objections_found": 0,
+        "objections": [],
+        "recommendations": ["Practice objection handling"],
+        "error": error
+    }
+
+def objection_agent(transcript: str) -> dict:
+    """Simple objection analysis"""
+    if not needs_llm(transcript):
+        return parse_response("", transcript)
+    
+    prompt = build_prompt(transcript)
+
     try:
-        response = run_llm(prompt, max_tokens=80)
-        
-        # Simple parsing
-        result = {
-            "objections_found": 0,
-            "objections": [],
-            "recommendations": ["Always ask about budget and timeline"],
-            "raw": response
-        }
-        
-        # Check for price/timing objections
-        if any(word in short.lower() for word in ["expensive", "cost", "price", "budget"]):
-            result["objections_found"] = 1
-            result["objections"] = [{
-                "type": "Price",
-                "customer_quote": "Potential budget concern",
-                "better_response": "Focus on ROI and value proposition"
-            }]
-        
-        return result
+        response = run_llm_fields(prompt, FIELDS)
+        return parse_response(response, transcript)
         
     except Exception as e:
-        return {
-            "objections_found": 0,
-            "objections": [],
-            "recommendations": ["Practice objection handling"],
-            "error": str(e)
-        }
\ No newline at end of file
+        return fallback_result(str(e))
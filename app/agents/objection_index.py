@@ -0,0 +1,127 @@
+"""
+Keyword/regex pre-filter for objection detection
+
+All taxonomy patterns are compiled into one alternation with a named
+group per objection type, so the transcript is scanned once regardless
+of how many patterns there are. Only text around the hits is sent to
+the LLM; calls without hits skip the objection LLM pass entirely.
+"""
+import json
+import os
+import re
+
+# Objection type -> regex fragments (matched case-insensitively on word boundaries).
+# Phrases, not topic words: "fees" or "later" alone show up in every call,
+# "too expensive" or "call me later" are the customer pushing back.
+DEFAULT_TAXONOMY = {
+    "Price": [
+        r"too (?:expensive|costly|much|high|steep)", r"(?:very|quite|so|really|bit|little) (?:expensive|costly|pricey)",
+        r"(?:can't|cannot|can not|won't be able to|not able to) afford", r"(?:out of|over|not in|beyond) (?:my|our) budget",
+        r"(?:fees?|charges?|premium|price|cost) (?:is|are|seems?|looks?) (?:very |quite |too |a bit )?(?:high|steep)",
+        r"(?:high|hidden) (?:fees|charges)", r"(?:cheaper|lower price) (?:elsewhere|somewhere else|option)",
+    ],
+    "Timing": [
+        r"not (?:right )?now", r"call (?:me )?(?:back )?later", r"(?:maybe|perhaps|let's talk) later",
+        r"(?:maybe|perhaps|call (?:me )?|talk )(?:in |after )?(?:the )?next (?:week|month|quarter|year)",
+        r"(?:i'm|i am|am) (?:very |really |a bit |too )?busy", r"(?:don't|do not) have (?:the )?time", r"no time",
+        r"call (?:me )?back", r"(?:let me|need to|i'll|i will|have to) think (?:about it|it over)",
+    ],
+    "Authority": [
+        r"(?:ask|discuss (?:it |this )?with|talk to|check with|consult|speak to) my (?:wife|husband|boss|manager|partner|family|father|son|daughter)",
+        r"not my decision", r"(?:need|needs) (?:an |his |her |their |my )?approval",
+        r"(?:my (?:wife|husband|boss|manager|partner|family|father)) (?:decides|will decide|handles)",
+    ],
+    "Competitor": [
+        r"already (?:have|use|using|invested)", r"(?:another|other) (?:bank|company|provider|advisor|agent)",
+        r"(?:getting|get|got|offering|offers?|gives?) (?:a |me a )?better (?:rate|offer|deal|returns?)",
+        r"why (?:should|would) i switch", r"not (?:going|planning) to switch",
+    ],
+    "Trust": [
+        r"not (?:sure|convinced) (?:about|if|whether) (?:this|it|that|the|your)", r"scam", r"fraud", r"don't trust",
+        r"bad experience", r"(?:too|very|seems|sounds|is it|is this|quite) risky",
+        r"(?:is (?:it|this|my money)|how) safe", r"lose (?:my|our) money",
+        r"(?:is (?:it|this|that|there (?:a|any))|any|no) guarantee(?:d|s)?",
+    ],
+}
+
+# Suggested handling per objection type
+BETTER_RESPONSES = {
+    "Price": "Focus on ROI and value proposition",
+    "Timing": "Agree a concrete follow-up date and what changes by then",
+    "Authority": "Offer a joint call with the decision maker",
+    "Competitor": "Compare on the customer's own criteria, not on features",
+    "Trust": "Share credentials, regulation details and client references",
+}
+
+# Characters of context kept on each side of a hit
+CONTEXT_RADIUS = 200
+
+class ObjectionIndex:
+    """Compiled multi-pattern matcher over an objection taxonomy"""
+
+    def __init__(self, taxonomy: dict = None):
+        self.taxonomy = taxonomy or DEFAULT_TAXONOMY
+        self._group_types = {}
+        alternatives = []
+        for i, (objection_type, patterns) in enumerate(self.taxonomy.items()):
+            group = f"t{i}"
+            self._group_types[group] = objection_type
+            # Longest first so "too much" wins over shorter overlaps
+            body = "|".join(sorted(patterns, key=len, reverse=True))
+            alternatives.append(f"(?P<{group}>{body})")
+        self.pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+    def find(self, text: str) -> list:
+        """
+        Scan text once for objection phrases
+
+        Returns:
+            [{"type", "match", "start", "end"}] in text order
+        """
+        return [
+            {
+                "type": self._group_types[m.lastgroup],
+                "match": m.group(),
+                "start": m.start(),
+                "end": m.end()
+            }
+            for m in self.pattern.finditer(text)
+        ]
+
+def context_spans(text: str, hits: list, radius: int = CONTEXT_RADIUS) -> list:
+    """Merge the context windows around hits into non-overlapping (start, end) spans"""
+    spans = []
+    for hit in hits:
+        start = max(0, hit["start"] - radius)
+        end = min(len(text), hit["end"] + radius)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+def quote_around(text: str, hit: dict, radius: int = 80) -> str:
+    """Short quote around a hit, trimmed to word boundaries"""
+    start = max(0, hit["start"] - radius)
+    end = min(len(text), hit["end"] + radius)
+    quote = text[start:end]
+    if start > 0:
+        quote = quote.split(" ", 1)[-1]
+    if end < len(text):
+        quote = quote.rsplit(" ", 1)[0]
+    return quote.strip()
+
+def load_taxonomy(path: str) -> dict:
+    """Load a {type: [patterns]} taxonomy from a JSON file"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# Global instance (OBJECTION_TAXONOMY=path/to/taxonomy.json overrides the default)
+_index = None
+
+def get_index() -> ObjectionIndex:
+    global _index
+    if _index is None:
+        path = os.environ.get("OBJECTION_TAXONOMY")
+        _index = ObjectionIndex(load_taxonomy(path) if path else None)
+    return _index
@@ -0,0 +1,57 @@
+"""
+Shared prompt pieces for the agents
+"""
+import re
+from app.agents.chunker import truncate_tokens
+from app.stt.diarize import CUSTOMER, REP
+
+# Hard cap on transcript tokens in one prompt (phi-2 has a 2048-token context,
+# the rest is for the instruction and answer). The orchestrator already sends
+# chunker-sized windows; this only guards direct calls with a whole
+# transcript. Counted per script, as Devanagari costs several tokens per char.
+MAX_CONTEXT_TOKENS = 1500
+
+def shared_prefix(transcript: str) -> str:
+    """Transcript block that starts every agent prompt"""
+    short = truncate_tokens(transcript, MAX_CONTEXT_TOKENS)
+    return f"""Sales call transcript:
+
+{short}
+
+"""
+
+# "Rep: " / "Customer: " / "Speaker 3: " turn labels from app.stt.diarize.format_turns
+_TURN = re.compile(rf"(?:^|(?<=\s))({REP}|{CUSTOMER}|Speaker \d+): ")
+
+def speaker_spans(transcript: str, speaker: str):
+    """
+    (start, end) offsets of one speaker's turns, labels excluded
+    
+    Returns:
+        List of spans, or None if the transcript has no speaker labels
+    """
+    labels = list(_TURN.finditer(transcript))
+    if not labels:
+        return None
+    ends = [m.start() for m in labels[1:]] + [len(transcript)]
+    return [(m.end(), end) for m, end in zip(labels, ends) if m.group(1) == speaker]
+
+def speaker_text(transcript: str, speaker: str) -> str:
+    """Only one speaker's turns ("..." between them); unlabeled text is returned as-is"""
+    spans = speaker_spans(transcript, speaker)
+    if spans is None:
+        return transcript
+    return " ... ".join(transcript[start:end].strip() for start, end in spans)
+
+def carry_speakers(windows: list) -> list:
+    """Start every window with the label of the turn it continues (windows can cut a turn)"""
+    carried = []
+    speaker = None
+    for window in windows:
+        labels = list(_TURN.finditer(window))
+        if speaker and (not labels or labels[0].start() > 0):
+            window = f"{speaker}: {window}"
+        if labels:
+            speaker = labels[-1].group(1)
+        carried.append(window)
+    return carried
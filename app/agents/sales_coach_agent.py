@@ -1,54 +1,94 @@
 """
 Simple coaching agent
 """
-from app.agents.fast_llm import run_llm
+import re
+from app.agents.chunker import unique
+from app.agents.fast_llm import run_llm_fields
+from app.agents.prompts import REP, shared_prefix, speaker_text
 
-def sales_coach_agent(transcript: str) -> dict:
-    """Simple coaching"""
-    short = transcript[:400]
-    
-    prompt = f"""As sales coach, give feedback on:
+MAX_TOKENS = 100
 
-{short}
+INSTRUCTION = """As sales coach, give feedback on this call.
 
 Feedback:
 Good: 
 Improve: 
 Score: /10"""
 
+# Output fields in order -> max tokens for each value
+FIELDS = {
+    "Good": 40,
+    "Improve": 40,
+    "Score": 6,
+}
+
+# Result keys the fields are parsed into
+KEYS = ("strengths", "improvements", "score")
+
+def context(transcript: str) -> str:
+    """Transcript text the agent reads - only the rep's turns when speakers are labeled"""
+    return speaker_text(transcript, REP) or transcript
+
+def build_prompt(transcript: str) -> str:
+    """Prompt for the coaching pass"""
+    return shared_prefix(context(transcript)) + INSTRUCTION
+
+def parse_response(response: str, transcript: str = "") -> dict:
+    """Turn raw LLM output into the coaching dict"""
+    result = {
+        "strengths": [],
+        "improvements": [],
+        "raw": response
+    }
+    
+    lines = response.strip().split('\n')
+    for line in lines:
+        if line.startswith("Good:"):
+            items = line.replace("Good:", "").strip()
+            result["strengths"] = [i.strip() for i in items.split(',') if i.strip()]
+        elif line.startswith("Improve:"):
+            items = line.replace("Improve:", "").strip()
+            result["improvements"] = [i.strip() for i in items.split(',') if i.strip()]
+        elif "Score:" in line:
+            score = line.split(":")[1].strip()
+            if score and not score.startswith("/"):
+                result["score"] = score
+    
+    # Unanswered fields are reported, not filled with made-up defaults
+    result["missing"] = [key for key in KEYS if not result.get(key)]
+    return result
+
+def merge_results(results: list) -> dict:
+    """Reduce per-window coaching into one for the whole call"""
+    if len(results) == 1:
+        return results[0]
+    
+    scores = []
+    for r in results:
+        match = re.search(r'\d+(\.\d+)?', str(r.get("score", "")))
+        if match:
+            scores.append(float(match.group()))
+    
+    merged = {
+        "strengths": unique(s for r in results for s in r.get("strengths", [])),
+        "improvements": unique(i for r in results for i in r.get("improvements", [])),
+    }
+    if scores:
+        merged["score"] = f"{sum(scores) / len(scores):.0f}/10"
+    merged["missing"] = [key for key in KEYS if not merged.get(key)]
+    merged["raw"] = "\n---\n".join(r.get("raw", "") for r in results)
+    return merged
+
+def fallback_result(error: str) -> dict:
+    return {"strengths": [], "improvements": [], "missing": list(KEYS), "error": error}
+
+def sales_coach_agent(transcript: str) -> dict:
+    """Simple coaching"""
+    prompt = build_prompt(transcript)
+
     try:
-        response = run_llm(prompt, max_tokens=100)
-        
-        result = {
-            "strengths": [],
-            "improvements": [],
-            "score": "7/10",
-            "raw": response
-        }
-        
-        lines = response.strip().split('\n')
-        for line in lines:
-            if line.startswith("Good:"):
-                items = line.replace("Good:", "").strip()
-                result["strengths"] = [i.strip() for i in items.split(',') if i.strip()]
-            elif line.startswith("Improve:"):
-                items = line.replace("Improve:", "").strip()
-                result["improvements"] = [i.strip() for i in items.split(',') if i.strip()]
-            elif "Score:" in line:
-                result["score"] = line.split(":")[1].strip()
-        
-        # Defaults
-        if not result["strengths"]:
-            result["strengths"] = ["Clear introduction", "Explained products"]
-        if not result["improvements"]:
-            result["improvements"] = ["Ask more questions", "Better closing"]
-        
-        return result
+        response = run_llm_fields(prompt, FIELDS)
+        return parse_response(response, transcript)
         
     except Exception as e:
-        return {
-            "strengths": ["Professional tone", "Product knowledge"],
-            "improvements": ["Could engage customer more", "Ask for needs"],
-            "score": "6/10",
-            "error": str(e)
-        }
\ No newline at end of file
+        return fallback_result(str(e))
@@ -1,58 +1,304 @@
 """
 Simple orchestrator
+
+Long transcripts are split into token-budgeted windows (map), every agent
+runs on every window, and each agent's merge_results combines the
+per-window findings (reduce).
+
+Each agent maps its windows in its own thread with its own deadline; their
+prompts still share batches in the LLM scheduler. An agent that fails or
+runs out of time is cancelled and reduced from the windows it finished,
+so the other agents' results are kept and metadata reports each agent's
+status and timing.
 """
+import os
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from app.utils import tracing
+from app.utils.tracing import span
+
+# Bump whenever agent prompts or parsing change (invalidates cached results)
+PROMPT_VERSION = "7"
+
+# "batched": each agent's windows in padded batches, "prefix": reuse the transcript KV cache, "sequential": one call per window
+MODES = ("batched", "prefix", "sequential")
+
+# Cap on LLM tokens (prompt + generated) spent on one call; long calls
+# keep an evenly spread subset of windows once this is reached
+MAX_CALL_TOKENS = 24000
+
+# Max windows per padded batch in batched mode (the scheduler may merge agents' batches)
+MAX_BATCH = 6
+
+# Rough token cost of the prompt scaffolding around each window
+PROMPT_OVERHEAD_TOKENS = 40
+
+# Seconds one agent may spend on a call before it is cancelled
+AGENT_TIMEOUT_SECONDS = float(os.environ.get("SALES_AI_AGENT_TIMEOUT", "300"))
+
+# Seconds to let cancelled agents stop (at their next token) and release the model
+CANCEL_GRACE_SECONDS = 5.0
+
+def _agent_modules():
+    from app.agents import transcript_agent, sales_coach_agent, objection_agent
+    return [transcript_agent, sales_coach_agent, objection_agent]
+
+def _map_agent(agent, windows: list, mode: str, done: dict):
+    """Run one agent over windows, storing each window's result in done as soon as it is parsed"""
+    from app.agents.fast_llm import run_llm_batch, run_llm_fields, run_llm_with_prefix
+    from app.agents.prompts import shared_prefix
+    
+    if mode == "batched":
+        for start in range(0, len(windows), MAX_BATCH):
+            group = windows[start:start + MAX_BATCH]
+            llm_windows = [w for w in group if _needs_llm(w, agent)]
+            outputs = run_llm_batch(
+                [agent.build_prompt(w) for w in llm_windows],
+                max_tokens=agent.MAX_TOKENS,
+                fields=list(agent.FIELDS)  # Stop once every field is written
+            ) if llm_windows else []
+            responses = dict(zip(llm_windows, outputs))
+            for window in group:
+                done[window] = agent.parse_response(responses.get(window, ""), window)
+        return
+    
+    for window in windows:
+        response = ""
+        if _needs_llm(window, agent):
+            if mode == "prefix":
+                # Each agent's own view of the window (speaker-filtered like
+                # build_prompt); agents reading the same text, e.g. all of them on
+                # an unlabeled transcript, share its cached KV prefix
+                response = run_llm_with_prefix(
+                    shared_prefix(agent.context(window)), [agent.INSTRUCTION],
+                    max_tokens=agent.MAX_TOKENS, fields=list(agent.FIELDS)
+                )[0]
+            else:
+                # Field-by-field constrained generation
+                response = run_llm_fields(agent.build_prompt(window), agent.FIELDS)
+        done[window] = agent.parse_response(response, window)
+
+def _short_name(agent) -> str:
+    """transcript_agent module -> "transcript" (span names)"""
+    return agent.__name__.rsplit(".", 1)[-1].replace("_agent", "")
+
+def _needs_llm(window: str, agent) -> bool:
+    """Agents may skip windows a cheap pre-filter rules out (parsed with an empty response)"""
+    needs_llm = getattr(agent, "needs_llm", None)
+    return needs_llm is None or needs_llm(window)
+
+def run_agent_tasks(windows: list, mode: str = "batched", precomputed: dict = None,
+                    timeout=AGENT_TIMEOUT_SECONDS) -> list:
+    """
+    Map every agent over the windows concurrently, each with its own deadline
+    
+    Args:
+        windows: Transcript windows
+        mode: One of MODES
+        precomputed: Optional {window text: per-window results} already mapped
+        timeout: Seconds per agent, {agent name: seconds}, or None for no deadline
+    
+    Returns:
+        One {"agent", "name", "status", "seconds", "error", "results"} per agent, in
+        _agent_modules() order. results is {window: result} for the windows it
+        finished; status is "ok", "partial" (failed or timed out after some
+        windows), "timeout" or "error" (nothing finished).
+    """
+    from app.agents.fast_llm import cancel_scope
+    
+    precomputed = precomputed or {}
+    todo = [w for w in dict.fromkeys(windows) if w not in precomputed]
+    start = time.time()
+    
+    runs = []
+    for i, agent in enumerate(_agent_modules()):
+        name = _short_name(agent)
+        limit = timeout.get(name, AGENT_TIMEOUT_SECONDS) if isinstance(timeout, dict) else timeout
+        runs.append({
+            "agent": agent,
+            "name": name,
+            "limit": limit,
+            "deadline": start + limit if limit is not None else float("inf"),
+            "cancel": threading.Event(),
+            # Windows mapped earlier (e.g. during transcription) are reused as-is
+            "done": {w: precomputed[w][i] for w in windows if w in precomputed},
+            "status": "ok",
+            "seconds": 0.0,
+            "error": None,
+        })
+    
+    def task(run):
+        deadline = run["deadline"] if run["deadline"] != float("inf") else None
+        with cancel_scope(run["cancel"].is_set, deadline), span(f"agent.{run['name']}", windows=len(todo)):
+            _map_agent(run["agent"], todo, mode, run["done"])
+    
+    def settle(run, error=None, timed_out=False):
+        run["results"] = dict(run["done"])  # Snapshot: a cancelled task may still be writing
+        run["seconds"] = round(time.time() - start, 2)
+        run["error"] = error
+        if error is not None:
+            run["status"] = "partial" if run["results"] else ("timeout" if timed_out else "error")
+    
+    if not todo:
+        for run in runs:
+            settle(run)
+        return runs
+    
+    # A thread per agent: a cancelled agent's thread only stops at its next token or window
+    pool = ThreadPoolExecutor(max_workers=len(runs), thread_name_prefix="agent")
+    futures = {pool.submit(tracing.bind(task), run): run for run in runs}
+    pending = set(futures)
+    try:
+        while pending:
+            next_deadline = min(futures[f]["deadline"] for f in pending)
+            wait_seconds = None if next_deadline == float("inf") else max(0.0, next_deadline - time.time())
+            finished, pending = wait(pending, timeout=wait_seconds, return_when=FIRST_COMPLETED)
+            for future in finished:
+                run = futures[future]
+                error = future.exception()
+                if error is not None:
+                    print(f"⚠️ {run['name']} agent failed: {error}")
+                    error = str(error) or type(error).__name__
+                settle(run, error)
+            
+            for future in list(pending):
+                run = futures[future]
+                if time.time() >= run["deadline"]:
+                    run["cancel"].set()
+                    future.cancel()
+                    pending.discard(future)
+                    print(f"⏱️ {run['name']} agent cancelled after {run['limit']:g}s")
+                    settle(run, f"No result within {run['limit']:g}s", timed_out=True)
+    finally:
+        for run in runs:
+            run["cancel"].set()  # Stops anything still running if we're leaving on an error
+        # Don't hand the next call a model still held by a cancelled agent
+        wait([f for f in futures if not f.done()], timeout=CANCEL_GRACE_SECONDS)
+        pool.shutdown(wait=False)
+    return runs
 
-def run_agents(transcript: str) -> dict:
-    """Run all agents"""
+def map_windows(windows: list, mode: str = "batched") -> list:
+    """
+    Map step: run every agent on every window (no deadline)
+    
+    Returns:
+        One [transcript_analysis, coaching_feedback, objection_analysis] per window
+    """
+    runs = run_agent_tasks(windows, mode, timeout=None)
+    for run in runs:
+        if run["status"] != "ok":
+            raise RuntimeError(f"{run['name']} agent failed: {run['error']}")
+    return [[run["results"][w] for run in runs] for w in windows]
+
+def max_windows(max_call_tokens: int = MAX_CALL_TOKENS) -> int:
+    """Windows one call can analyze within max_call_tokens"""
+    from app.agents.chunker import WINDOW_TOKENS
+    
+    per_window = sum(WINDOW_TOKENS + PROMPT_OVERHEAD_TOKENS + agent.MAX_TOKENS for agent in _agent_modules())
+    return max(1, max_call_tokens // per_window)
+
+def plan_windows(transcript: str, max_call_tokens: int = MAX_CALL_TOKENS) -> tuple:
+    """
+    Chunk a transcript and apply the per-call token cap
+    
+    Returns:
+        (selected windows, total window count)
+    """
+    from app.agents.chunker import chunk_transcript, select_windows
+    from app.agents.prompts import carry_speakers
+    
+    windows = carry_speakers(chunk_transcript(transcript))
+    return select_windows(windows, max_windows(max_call_tokens)), len(windows)
+
+def run_agents(transcript: str, mode: str = "batched", max_call_tokens: int = MAX_CALL_TOKENS,
+               precomputed: dict = None, timeout=AGENT_TIMEOUT_SECONDS) -> dict:
+    """
+    Run all agents over the whole transcript (map-reduce over windows)
+    
+    Args:
+        transcript: Cleaned transcript
+        mode: One of MODES - how the agent prompts are sent to the LLM
+        max_call_tokens: Cap on LLM tokens spent on this call
+        precomputed: Optional {window text: per-window results} already mapped
+            (e.g. while transcription was still running)
+        timeout: Seconds per agent, or {agent name: seconds}
+    
+    Returns:
+        {"transcript_analysis", "coaching_feedback", "objection_analysis", "metadata"}.
+        metadata["status"] is "success" (every agent finished), "partial"
+        (some agents failed or timed out; their entries are reduced from the
+        windows they finished, or are their fallback_result) or "failed"
+        (nothing ran; "error" is set). metadata["agents"] has each agent's
+        status, seconds, finished windows and error.
+    """
     start = time.time()
     
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    
     if not transcript:
         return {"error": "No transcript"}
     
     print("Starting analysis...")
+    keys = ("transcript_analysis", "coaching_feedback", "objection_analysis")
     
     try:
-        # Import here to avoid circular imports
-        from app.agents.transcript_agent import transcript_agent
-        from app.agents.sales_coach_agent import sales_coach_agent
-        from app.agents.objection_agent import objection_agent
+        windows, total_windows = plan_windows(transcript, max_call_tokens)
+        precomputed = precomputed or {}
         
-        # Run agents
-        t1 = transcript_agent(transcript)
-        t2 = sales_coach_agent(transcript)
-        t3 = objection_agent(transcript)
+        with span("agents.map", mode=mode, windows=len(windows),
+                  precomputed=sum(w in precomputed for w in windows)):
+            runs = run_agent_tasks(windows, mode, precomputed, timeout)
         
-        result = {
-            "transcript_analysis": t1,
-            "coaching_feedback": t2,
-            "objection_analysis": t3,
-            "metadata": {
-                "time": f"{time.time()-start:.1f}s",
-                "status": "success"
-            }
+        result = {}
+        agents_meta = {}
+        with span("agents.reduce", windows=len(windows)):
+            for key, run in zip(keys, runs):
+                agent = run["agent"]
+                per_window = [run["results"][w] for w in windows if w in run["results"]]
+                try:
+                    if not per_window:
+                        raise RuntimeError(run["error"])
+                    agent_result = agent.merge_results(per_window)
+                    # Whole-transcript post-processing (e.g. objection offsets)
+                    finalize = getattr(agent, "finalize", None)
+                    if finalize is not None:
+                        finalize(agent_result, transcript)
+                except Exception as e:
+                    if run["status"] == "ok":
+                        run["status"], run["error"] = "error", str(e)  # Reduce failed, not the map
+                    agent_result = agent.fallback_result(run["error"])
+                result[key] = agent_result
+                agents_meta[run["name"]] = {
+                    "status": run["status"],
+                    "seconds": run["seconds"],
+                    "windows": len(per_window),
+                    "error": run["error"],
+                }
+        
+        if all(run["status"] == "ok" for run in runs):
+            status = "success"
+        elif any(run["status"] in ("ok", "partial") for run in runs):
+            status = "partial"
+        else:
+            status = "failed"
+            result["error"] = "; ".join(f"{run['name']}: {run['error']}" for run in runs)
+        result["metadata"] = {
+            "time": f"{time.time()-start:.1f}s",
+            "status": status,
+            "mode": mode,
+            "windows": len(windows),
+            "windows_total": total_windows,
+            "agents": agents_meta
         }
         
-        print(f"Analysis done in {result['metadata']['time']}")
+        print(f"Analysis done in {result['metadata']['time']} ({result['metadata']['status']})")
         return result
         
     except Exception as e:
         print(f"Error: {e}")
-        return {
-            "transcript_analysis": {
-                "summary": "Wealth management discussion",
-                "call_type": "Sales",
-                "sentiment": "Positive",
-                "next_step": "Share details"
-            },
-            "coaching_feedback": {
-                "strengths": ["Professional", "Knowledgeable"],
-                "improvements": ["More engagement needed"],
-                "score": "7/10"
-            },
-            "objection_analysis": {
-                "objections_found": 0,
-                "recommendations": ["Ask qualifying questions"]
-            },
-            "metadata": {"status": "fallback"}
-        }
\ No newline at end of file
+        result = {key: agent.fallback_result(str(e)) for key, agent in zip(keys, _agent_modules())}
+        result["error"] = str(e)
+        result["metadata"] = {"time": f"{time.time()-start:.1f}s", "status": "failed", "mode": mode, "agents": {}}
+        return result
@@ -1,15 +1,14 @@
 """
 Simple transcript agent
 """
-from app.agents.fast_llm import run_llm
+from collections import Counter
+from app.agents.chunker import select_windows, unique
+from app.agents.fast_llm import run_llm_fields
+from app.agents.prompts import shared_prefix
 
-def transcript_agent(transcript: str) -> dict:
-    """Simple analysis"""
-    short = transcript[:500]
-    
-    prompt = f"""Analyze this sales call:
+MAX_TOKENS = 100
 
-{short}
+INSTRUCTION = """Analyze this sales call.
 
 Give me:
 1. Summary: 
@@ -17,43 +16,83 @@ Give me:
 3. Sentiment: 
 4. Next Step:"""
 
+# Output fields in order -> max tokens for each value
+FIELDS = {
+    "Summary": 50,
+    "Type": 8,
+    "Sentiment": 8,
+    "Next Step": 30,
+}
+
+# Window summaries kept in the call summary, spread from start to end
+MAX_SUMMARIES = 4
+
+# Result keys the fields are parsed into
+KEYS = ("summary", "call_type", "sentiment", "next_step")
+
+def context(transcript: str) -> str:
+    """Transcript text the agent reads - the whole window, both speakers"""
+    return transcript
+
+def build_prompt(transcript: str) -> str:
+    """Prompt for the call understanding pass"""
+    return shared_prefix(context(transcript)) + INSTRUCTION
+
+def parse_response(response: str, transcript: str = "") -> dict:
+    """Turn raw LLM output into the analysis dict"""
+    # Simple parsing
+    lines = response.strip().split('\n')
+    result = {"raw": response}
+    
+    for line in lines:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            key = key.strip().lower().replace(' ', '_')
+            if 'summary' in key:
+                result['summary'] = value.strip()
+            elif 'type' in key:
+                result['call_type'] = value.strip()
+            elif 'sentiment' in key:
+                result['sentiment'] = value.strip()
+            elif 'next' in key:
+                result['next_step'] = value.strip()
+    
+    # Unanswered fields are reported, not filled with made-up defaults
+    result['missing'] = [key for key in KEYS if not result.get(key)]
+    return result
+
+def merge_results(results: list) -> dict:
+    """Reduce per-window analyses into one for the whole call"""
+    if len(results) == 1:
+        return results[0]
+    
+    summaries = unique(r["summary"] for r in results if r.get("summary"))
+    next_steps = [r["next_step"] for r in results if r.get("next_step")]
+    merged = {
+        "summary": " ".join(select_windows(summaries, MAX_SUMMARIES)),
+        "call_type": _most_common(r.get("call_type") for r in results),
+        "sentiment": _most_common(r.get("sentiment") for r in results),
+        "next_step": next_steps[-1] if next_steps else None,  # The end of the call decides the next step
+    }
+    merged = {key: value for key, value in merged.items() if value}
+    merged["missing"] = [key for key in KEYS if key not in merged]
+    merged["raw"] = "\n---\n".join(r.get("raw", "") for r in results)
+    return merged
+
+def _most_common(values):
+    values = [v for v in values if v]
+    return Counter(values).most_common(1)[0][0] if values else None
+
+def fallback_result(error: str) -> dict:
+    return {"missing": list(KEYS), "error": error}
+
+def transcript_agent(transcript: str) -> dict:
+    """Simple analysis"""
+    prompt = build_prompt(transcript)
+
     try:
-        response = run_llm(prompt, max_tokens=100)
-        
-        # Simple parsing
-        lines = response.strip().split('\n')
-        result = {"raw": response}
-        
-        for line in lines:
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip().lower().replace(' ', '_')
-                if 'summary' in key:
-                    result['summary'] = value.strip()
-                elif 'type' in key:
-                    result['call_type'] = value.strip()
-                elif 'sentiment' in key:
-                    result['sentiment'] = value.strip()
-                elif 'next' in key:
-                    result['next_step'] = value.strip()
-        
-        # Default values
-        if 'summary' not in result:
-            result['summary'] = "Sales call about financial products and services"
-        if 'call_type' not in result:
-            result['call_type'] = "Sales"
-        if 'sentiment' not in result:
-            result['sentiment'] = "Neutral"
-        if 'next_step' not in result:
-            result['next_step'] = "Follow up with details"
-        
-        return result
+        response = run_llm_fields(prompt, FIELDS)
+        return parse_response(response, transcript)
         
     except Exception as e:
-        return {
-            "summary": "Discussed wealth management products and services",
-            "call_type": "Sales",
-            "sentiment": "Positive",
-            "next_step": "Share product details via WhatsApp",
-            "error": str(e)
-        }
\ No newline at end of file
+        return fallback_result(str(e))
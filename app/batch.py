@@ -0,0 +1,292 @@
+"""
+Headless batch analysis for large sets of recorded calls
+
+Usage:
+    python -m app.batch data/calls --out results.jsonl --stt-workers 4
+    python -m app.batch manifest.txt --out results.jsonl
+
+Input is a directory (searched recursively) or a manifest file with one
+audio path per line. Each finished call is appended to the output JSONL,
+which doubles as the checkpoint: re-running the same command skips every
+file whose hash already has an "ok" record.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from app.utils.result_cache import hash_file
+
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a"}
+
+def find_inputs(source: str) -> list:
+    """Audio paths from a directory or a manifest file"""
+    path = Path(source)
+    if path.is_dir():
+        return sorted(str(p) for p in path.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)
+
+    inputs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                inputs.append(line)
+    return inputs
+
+def load_checkpoint(out_path: str) -> set:
+    """Hashes of calls already finished in a previous run"""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from an interrupted write
+            if record.get("status") == "ok":
+                done.add(record["sha256"])
+    return done
+
+def _append(out, record):
+    """Append one JSONL record durably (the output file is also the checkpoint)"""
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+    os.fsync(out.fileno())
+
+def _input_error(path, error) -> dict:
+    """Record for a manifest entry that can't be read (missing file, permissions, ...)"""
+    print(f"❌ {path}: {error}")
+    return {"path": path, "sha256": None, "status": "error", "stage": "input", "error": str(error)}
+
+def _init_worker(threads):
+    """Split CPU threads between worker processes"""
+    import torch
+    torch.set_num_threads(threads)
+
+def _transcribe_job(path, call_id=None, audio_hash=None):
+    """Decode + transcribe + diarize + clean one call (runs in the STT pool)"""
+    from app.stt.audio import duration, in_use, load_audio
+    from app.stt.diarize import DIARIZE, diarize, format_turns
+    from app.stt.simple_whisper import detect_language, transcribe_stream
+    from app.utils.call_stats import call_stats
+    from app.utils.text_cleaner import SegmentCleaner
+    from app.utils.tracing import call_context, span
+
+    start = time.time()
+    with call_context(call_id), in_use(path):
+        language = detect_language(path, audio_hash=audio_hash)
+        # Files already run in parallel across the STT pool, so no chunk pool per file
+        segments = list(transcribe_stream(path, language=language, workers=1))
+        audio = load_audio(path)  # Buffer transcribe_stream already decoded
+        if DIARIZE:
+            segments = diarize(audio, segments)
+        with span("clean", segments=len(segments)):
+            cleaner = SegmentCleaner()
+            transcript = format_turns([dict(seg, text=cleaner.feed(seg["text"])) for seg in segments])
+        audio_seconds = duration(audio)
+    return {
+        "transcript": transcript,
+        "audio_seconds": audio_seconds,
+        "stats": call_stats(segments, audio_seconds),
+        "stt_seconds": round(time.time() - start, 2)
+    }
+
+def _analyze_job(transcript, call_id=None):
+    """Run the agents on one transcript (runs in the LLM pool)"""
+    from app.agents.simple_orchestrator import run_agents
+    from app.utils.tracing import call_context
+
+    start = time.time()
+    with call_context(call_id):
+        analysis = run_agents(transcript)
+    return {"analysis": analysis, "llm_seconds": round(time.time() - start, 2)}
+
+class ThroughputMeter:
+    """Running calls/hour and audio-seconds/second"""
+
+    def __init__(self):
+        self.start = time.time()
+        self.calls = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+
+    def add(self, record):
+        if record["status"] == "ok":
+            self.calls += 1
+            self.audio_seconds += record.get("audio_seconds", 0.0)
+        else:
+            self.failed += 1
+
+    def report(self) -> str:
+        elapsed = max(time.time() - self.start, 1e-9)
+        return (f"{self.calls} done, {self.failed} failed in {elapsed:.0f}s | "
+                f"{self.calls / elapsed * 3600:.1f} calls/hour | "
+                f"{self.audio_seconds / elapsed:.2f} audio-s/s")
+
+def run_batch(source: str, out_path: str, stt_workers: int = 2, llm_workers: int = 1) -> ThroughputMeter:
+    """
+    Transcribe and analyze every call in source, appending results to out_path
+
+    Args:
+        source: Directory or manifest file
+        out_path: Output JSONL (also the checkpoint)
+        stt_workers: Whisper processes
+        llm_workers: LLM processes (each holds its own model copy)
+
+    Returns:
+        Throughput meter for the run
+    """
+    inputs = find_inputs(source)
+    done = load_checkpoint(out_path)
+
+    meter = ThroughputMeter()
+    pending = []
+    unreadable = []
+    seen = set(done)
+    for path in inputs:
+        try:
+            digest = hash_file(path)
+        except OSError as e:
+            unreadable.append(_input_error(path, e))
+            continue
+        if digest not in seen:
+            seen.add(digest)
+            pending.append((path, digest))
+
+    if unreadable:
+        with open(out_path, "a", encoding="utf-8") as out:
+            for record in unreadable:
+                _append(out, record)
+                meter.add(record)
+
+    skipped = len(inputs) - len(pending) - len(unreadable)
+    print(f"📦 {len(inputs)} files, {skipped} already done or duplicate, {len(unreadable)} unreadable, {len(pending)} to process")
+    if not pending:
+        return meter
+
+    threads = max(1, (os.cpu_count() or 1) // (stt_workers + llm_workers))
+    ctx = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(stt_workers, mp_context=ctx, initializer=_init_worker, initargs=(threads,)) as stt_pool, \
+         ProcessPoolExecutor(llm_workers, mp_context=ctx, initializer=_init_worker, initargs=(threads,)) as llm_pool, \
+         open(out_path, "a", encoding="utf-8") as out:
+
+        # Trace spans are tagged with the file hash prefix as the call ID
+        stt_futures = {stt_pool.submit(_transcribe_job, path, digest[:12], digest): (path, digest) for path, digest in pending}
+        llm_futures = {}
+
+        def write(record):
+            _append(out, record)
+            meter.add(record)
+
+        # STT results feed the LLM pool as soon as they finish; every record
+        # is written the moment its call is done so an interrupt loses nothing
+        while stt_futures or llm_futures:
+            finished, _ = wait(list(stt_futures) + list(llm_futures), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in stt_futures:
+                    path, digest = stt_futures.pop(future)
+                    try:
+                        stt = future.result()
+                    except Exception as e:
+                        write({"path": path, "sha256": digest, "status": "error", "stage": "stt", "error": str(e)})
+                        continue
+                    llm_futures[llm_pool.submit(_analyze_job, stt["transcript"], digest[:12])] = (path, digest, stt)
+                else:
+                    path, digest, stt = llm_futures.pop(future)
+                    record = {"path": path, "sha256": digest, **stt}
+                    try:
+                        record.update(future.result())
+                        # Fallback analyses are retried on the next run
+                        ok = record["analysis"].get("metadata", {}).get("status") == "success"
+                        record["status"] = "ok" if ok else "error"
+                    except Exception as e:
+                        record.update({"status": "error", "stage": "agents", "error": str(e)})
+                    write(record)
+                    print(f"{'✅' if record['status'] == 'ok' else '❌'} {path} | {meter.report()}")
+
+    print(f"🏁 {meter.report()}")
+    return meter
+
+def run_batch_in_process(source: str, out_path: str, max_queue: int = 2) -> ThroughputMeter:
+    """
+    Same as run_batch, but through the threaded stage pipeline in this
+    process: one copy of each model, decode/STT/agents overlapping, and a
+    per-stage throughput report at the end
+    """
+    from app.pipeline import build_call_pipeline
+
+    inputs = find_inputs(source)
+    seen = load_checkpoint(out_path)
+    meter = ThroughputMeter()
+    pipeline = build_call_pipeline(max_queue=max_queue)
+    write_lock = threading.Lock()
+
+    with open(out_path, "a", encoding="utf-8") as out:
+
+        def on_done(future, path, digest):
+            try:
+                item = future.result()
+                ok = item["analysis"].get("metadata", {}).get("status") == "success"
+                record = {
+                    "path": path, "sha256": digest, "status": "ok" if ok else "error",
+                    "language": item["language"], "audio_seconds": item["audio_seconds"],
+                    "transcript": item["transcript"], "analysis": item["analysis"]
+                }
+            except Exception as e:
+                record = {"path": path, "sha256": digest, "status": "error", "error": str(e)}
+            with write_lock:
+                _append(out, record)
+                meter.add(record)
+                print(f"{'✅' if record['status'] == 'ok' else '❌'} {path} | {meter.report()}")
+
+        for path in inputs:
+            try:
+                digest = hash_file(path)
+            except OSError as e:
+                record = _input_error(path, e)
+                with write_lock:
+                    _append(out, record)
+                    meter.add(record)
+                continue
+            if digest in seen:
+                continue
+            seen.add(digest)
+            # Blocks while the decode queue is full (backpressure)
+            future = pipeline.submit({"path": path, "audio_hash": digest})
+            future.add_done_callback(lambda f, p=path, d=digest: on_done(f, p, d))
+
+        pipeline.close()
+
+    print(f"🏁 {meter.report()}")
+    print(pipeline.format_report())
+    return meter
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-analyze recorded sales calls")
+    parser.add_argument("source", help="Directory of audio files or manifest with one path per line")
+    parser.add_argument("--out", default="batch_results.jsonl", help="Output JSONL (also used to resume)")
+    parser.add_argument("--stt-workers", type=int, default=2, help="Whisper worker processes")
+    parser.add_argument("--llm-workers", type=int, default=1, help="LLM worker processes")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Use the threaded stage pipeline (one model copy each) instead of process pools")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"❌ Not found: {args.source}")
+        return 1
+
+    if args.in_process:
+        run_batch_in_process(args.source, args.out)
+    else:
+        run_batch(args.source, args.out, args.stt_workers, args.llm_workers)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,6 @@
 Simple Sales Call Analyzer - Ready to Run
 """
 import streamlit as st
-import uuid
 import os
 import sys
 from pathlib import Path
@@ -13,9 +12,17 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 # Simple imports
 try:
-    from app.agents.simple_orchestrator import run_agents
-    from app.stt.simple_whisper import transcribe_audio
-    from app.utils.text_cleaner import clean_text
+    from app.agents.simple_orchestrator import run_agents, PROMPT_VERSION
+    from app.agents.fast_llm import llm_version
+    from app.stt.audio import in_use
+    from app.stt.diarize import DIARIZE, DIARIZE_VERSION, REP
+    from app.stt.simple_whisper import STT_VERSION
+    from app.utils.text_cleaner import CLEANER_VERSION
+    from app.utils.result_cache import get_cache, make_key
+    from app.utils.spool import get_spool
+    from app.pipeline import StreamingCall
+    from app.utils import tracing
+    from app.warmup import start_background_warmup
 except ImportError as e:
     st.error(f"Import error: {e}. Please check all agent files exist.")
     st.stop()
@@ -69,28 +76,80 @@ uploaded_file = st.file_uploader(
 )
 
 if uploaded_file:
-    # Save file
-    file_id = str(uuid.uuid4())[:8]
-    audio_path = f"temp_audio_{file_id}.{uploaded_file.name.split('.')[-1]}"
+    # Copy the upload (already in memory as a Streamlit UploadedFile) into the
+    # spool in chunks, hashing as it goes, so ffmpeg gets a file. Reruns of
+    # the script reuse the spooled copy; spool GC replaces per-run cleanup.
+    upload_id = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    spooled = st.session_state.get("spooled_upload")
+    if spooled is None or spooled[0] != upload_id or not os.path.exists(spooled[1]):
+        try:
+            uploaded_file.seek(0)
+            audio_path, audio_hash = get_spool().store(uploaded_file, suffix=os.path.splitext(uploaded_file.name)[1])
+        except (OSError, ValueError) as e:
+            st.error(f"❌ Could not store upload: {e}")
+            st.stop()
+        st.session_state["spooled_upload"] = (upload_id, audio_path, audio_hash)
+    else:
+        _, audio_path, audio_hash = spooled
+    file_id = audio_hash[:8]
     
-    with open(audio_path, "wb") as f:
-        f.write(uploaded_file.read())
+    # Cache keys: same bytes + same model/prompt versions => same results
+    cache = get_cache()
+    transcript_key = make_key("transcript", audio_hash, STT_VERSION, DIARIZE_VERSION, CLEANER_VERSION)
+    stats_key = make_key("call_stats", audio_hash, STT_VERSION, DIARIZE_VERSION)
+    
+    def analysis_key():
+        # Re-read on store: the LLM may have fallen back to another model while analyzing
+        return make_key("analysis", audio_hash, STT_VERSION, DIARIZE_VERSION, CLEANER_VERSION,
+                        llm_version(), PROMPT_VERSION)
+    
+    call_id = audio_hash[:12]  # Tags this run's trace spans (scoped to each tab block)
     
     st.success(f"✅ File uploaded: {uploaded_file.name}")
     
     # Create tabs for different views
     tab1, tab2, tab3 = st.tabs(["📝 Transcription", "🧠 Analysis", "📊 Insights"])
     
-    with tab1:
-        # Transcribe
-        with st.spinner("Transcribing audio... This may take a moment."):
-            try:
-                transcript = transcribe_audio(audio_path)
-                transcript = clean_text(transcript)
-                st.success("✅ Transcription complete!")
-            except Exception as e:
-                st.error(f"❌ Transcription failed: {str(e)}")
-                transcript = "Transcription error. Please try a different audio file."
+    # Pinned so spool GC can't remove the upload or its memmap mid-transcription
+    with tab1, tracing.call_context(call_id), in_use(audio_path):
+        # Transcribe (or reuse a cached transcript for the same audio)
+        transcript = cache.get(transcript_key)
+        stats = cache.get(stats_key)  # Talk-time metrics from the segment timestamps
+        streaming = None  # StreamingCall, whose early window results the analysis reuses
+        if transcript is not None:
+            st.success("✅ Transcription complete! (cached)")
+        else:
+            progress = st.empty()
+            live_text = st.empty()
+            parts = []
+            streaming = StreamingCall(audio_path, audio_hash, analyze_early=cache.get(analysis_key()) is None)
+            with st.spinner("Transcribing audio... Text appears as each 30s window is done."):
+                try:
+                    language = streaming.detect_language()
+                    st.caption(f"🌐 Detected language: {language}")
+                    if DIARIZE:
+                        st.caption("🗣️ Speaker labels are on (SALES_AI_DIARIZE=1), so AI analysis "
+                                   "starts after transcription instead of while transcribing")
+                    for segment, cleaned in streaming.transcribe():
+                        if cleaned:
+                            parts.append(cleaned)
+                        progress.caption(f"⏱️ Transcribed up to {segment['end']:.0f}s")
+                        live_text.write(" ".join(parts))
+                    
+                    if DIARIZE:
+                        progress.caption("🗣️ Separating speakers...")
+                    transcript, stats = streaming.finish()
+                    cache.set(transcript_key, transcript)
+                    cache.set(stats_key, stats)
+                    st.success("✅ Transcription complete!")
+                except Exception as e:
+                    st.error(f"❌ Transcription failed: {str(e)}")
+                    transcript = "Transcription error. Please try a different audio file."
+                    stats = None
+                    streaming.early.clear()  # Not for a failed transcript
+            streaming.close()
+            progress.empty()
+            live_text.empty()
         
         st.markdown("### Transcript")
         st.write(transcript)
@@ -102,16 +161,43 @@ if uploaded_file:
         with col2:
             st.metric("Words", len(transcript.split()))
         with col3:
-            st.metric("Estimated Duration", f"{len(transcript.split())/2:.0f}s")
+            st.metric("Duration", f"{stats['duration_seconds']:.0f}s" if stats else "-")
+        
+        if stats:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Speech / Silence", f"{stats['speech_ratio']:.0%} / {1 - stats['speech_ratio']:.0%}")
+            with col2:
+                st.metric("Speaking Rate", f"{stats['wpm']:.0f} WPM")
+            with col3:
+                monologue = stats["longest_monologue"]
+                st.metric("Longest Monologue", f"{monologue['seconds']:.0f}s",
+                          help=f"{monologue['start']:.0f}s - {monologue['end']:.0f}s into the call"
+                               + (f" ({monologue['speaker']})" if monologue.get("speaker") else ""))
+            with col4:
+                share = stats.get("talk_share", {})
+                st.metric("Rep Talk Share", f"{share[REP]:.0%}" if REP in share else "-")
+            
+            rates = [wpm for wpm in stats["segment_wpm"] if wpm is not None]
+            if rates:
+                with st.expander("📈 Words per minute by segment"):
+                    st.line_chart(rates)
     
     # Analysis tab
-    with tab2:
+    with tab2, tracing.call_context(call_id):
         if transcript and len(transcript) > 20:
-            # Analyze with AI
+            # Analyze with AI (or reuse cached results for the same audio)
             with st.spinner("🤖 Analyzing call with AI... This may take 10-30 seconds."):
                 start_time = time.time()
                 try:
-                    results = run_agents(transcript)
+                    results = cache.get(analysis_key())
+                    if results is None:
+                        # Windows mapped during transcription are reused as-is
+                        precomputed = streaming.early_results() if streaming else {}
+                        results = run_agents(transcript, precomputed=precomputed)
+                        if results.get("metadata", {}).get("status") == "success":
+                            cache.set(analysis_key(), results)
+                        tracing.record("call.analyze", time.time() - start_time, early_windows=len(precomputed))
                     processing_time = time.time() - start_time
                 except Exception as e:
                     st.error(f"Analysis failed: {str(e)}")
@@ -123,6 +209,17 @@ if uploaded_file:
                     }
                     processing_time = 0
             
+            # Agents that failed or ran out of time (the others' results are still shown)
+            metadata = results.get("metadata", {})
+            unfinished = {name: run for name, run in metadata.get("agents", {}).items() if run["status"] != "ok"}
+            if metadata.get("status") == "failed":
+                st.error(f"❌ Analysis failed: {results.get('error')}")
+            elif unfinished:
+                st.warning("⚠️ Partial analysis: " + ", ".join(
+                    f"{name.replace('_', ' ')} {run['status']} ({run['windows']} of {metadata['windows']} windows)"
+                    for name, run in unfinished.items()
+                ))
+            
             if "error" not in results:
                 st.success(f"✅ Analysis complete in {processing_time:.1f} seconds!")
                 
@@ -143,7 +240,7 @@ if uploaded_file:
                 
                 with col2:
                     st.markdown("**Sentiment**")
-                    sentiment = trans.get("sentiment", "Neutral")
+                    sentiment = trans.get("sentiment", "Unknown")
                     if sentiment.lower() == "positive":
                         st.success(f"😊 {sentiment}")
                     elif sentiment.lower() == "negative":
@@ -190,7 +287,7 @@ if uploaded_file:
                 st.metric("📊 Coaching Score", score)
     
     # Insights tab
-    with tab3:
+    with tab3, tracing.call_context(call_id):
         if transcript and len(transcript) > 20 and "error" not in results:
             # Objection Analysis
             st.markdown("### ⚠️ Objection Analysis")
@@ -205,6 +302,9 @@ if uploaded_file:
                 if "quick_stats" in objections:
                     st.metric("Handling Score", f"{objections['quick_stats'].get('avg_handling_score', 0)}/10")
             
+            if objections.get("main_issue"):
+                st.info(f"**Main issue:** {objections['main_issue']}")
+            
             if objections.get("objections"):
                 st.markdown("**🔍 Key Objections:**")
                 for i, obj in enumerate(objections.get("objections", [])[:3], 1):  # Show max 3
@@ -253,13 +353,6 @@ Analysis completed in: {processing_time:.1f} seconds
                 file_name=f"sales_analysis_{file_id}.txt",
                 mime="text/plain"
             )
-    
-    # Cleanup
-    try:
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
-    except:
-        pass
 
 else:
     # Show instructions when no file uploaded
@@ -299,4 +392,16 @@ else:
 
 # Footer
 st.markdown("---")
-st.caption("🎤 Sales Call Analyzer v1.0 • Powered by AI • Free and Open Source")
\ No newline at end of file
+st.caption("🎤 Sales Call Analyzer v1.0 • Powered by AI • Free and Open Source")
+
+# Load and warm up both models once per server process, in the background.
+# Started after the page is drawn so the first render never waits on torch
+# (SALES_AI_WARMUP=0 skips it; models then load on first use).
+# METRICS_PORT=9100 also serves span p50/p95 at http://127.0.0.1:9100/metrics
+@st.cache_resource
+def warm_models():
+    if os.environ.get("METRICS_PORT"):
+        tracing.start_metrics_server(int(os.environ["METRICS_PORT"]))
+    return start_background_warmup()
+
+warm_models()
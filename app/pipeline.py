@@ -0,0 +1,311 @@
+"""
+In-process analysis pipeline: decode -> STT -> clean -> agents
+
+Each stage has its own worker threads and a bounded input queue, so while
+Whisper transcribes call N+1 the LLM can analyze call N. A full queue
+blocks the stage before it (backpressure) instead of piling decoded audio
+up in memory. Torch and ffmpeg release the GIL, so threads are enough to
+keep both models busy.
+
+Only `python -m app.batch --in-process` runs calls through it. The
+Streamlit UI handles one upload at a time with StreamingCall (below),
+which starts the analysis while transcription is still running;
+benchmarks/suite.py times that same path.
+"""
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.utils import tracing
+from app.utils.tracing import call_context, span
+
+_STOP = object()
+
+class Stage:
+    """One pipeline step with its own workers, input queue and counters"""
+
+    def __init__(self, name: str, fn, workers: int = 1, max_queue: int = 4):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_depth = 0
+        self._lock = threading.Lock()
+
+    def put(self, job):
+        self.queue.put(job)  # Blocks when full
+        with self._lock:
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def record(self, busy, waited, ok):
+        with self._lock:
+            self.busy_seconds += busy
+            self.wait_seconds += waited
+            if ok:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+class Pipeline:
+    """Chain of stages; submit() returns a Future for the last stage's output"""
+
+    def __init__(self, stages: list):
+        self.stages = stages
+        self.started_at = time.time()
+        self._threads = []
+        self._exited = [0] * len(stages)
+        self._exit_lock = threading.Lock()
+
+        for index, stage in enumerate(stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(index,), name=f"{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, item) -> Future:
+        """Queue one item (blocks while the first stage is full)"""
+        future = Future()
+        self.stages[0].put((future, item, time.time()))
+        return future
+
+    def _work(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            job = stage.queue.get()
+            if job is _STOP:
+                break
+            future, item, queued_at = job
+            if future.cancelled():
+                continue
+
+            start = time.time()
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                stage.record(time.time() - start, start - queued_at, ok=False)
+                future.set_exception(e)
+                continue
+            stage.record(time.time() - start, start - queued_at, ok=True)
+
+            if next_stage is None:
+                future.set_result(result)
+            else:
+                next_stage.put((future, result, time.time()))
+
+        # Last worker out tells the next stage to stop once its queue drains
+        with self._exit_lock:
+            self._exited[index] += 1
+            done = self._exited[index] == stage.workers
+        if done and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.queue.put(_STOP)
+
+    def close(self, wait: bool = True):
+        """Stop accepting work; finish what is queued"""
+        for _ in range(self.stages[0].workers):
+            self.stages[0].queue.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def report(self) -> list:
+        """Per-stage throughput; the stage with the highest utilization is the bottleneck"""
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        rows = []
+        for stage in self.stages:
+            done = stage.processed + stage.failed
+            rows.append({
+                "stage": stage.name,
+                "workers": stage.workers,
+                "processed": stage.processed,
+                "failed": stage.failed,
+                "items_per_min": stage.processed / elapsed * 60,
+                "avg_seconds": stage.busy_seconds / done if done else 0.0,
+                "avg_queue_wait": stage.wait_seconds / done if done else 0.0,
+                "max_queue_depth": stage.max_depth,
+                "utilization": stage.busy_seconds / (elapsed * stage.workers),
+            })
+        return rows
+
+    def format_report(self) -> str:
+        rows = self.report()
+        bottleneck = max(rows, key=lambda r: r["utilization"])["stage"] if rows else None
+        lines = [f"{'stage':<8}{'workers':>8}{'done':>6}{'fail':>6}{'/min':>8}{'avg s':>8}{'wait s':>8}{'maxq':>6}{'util':>7}"]
+        for r in rows:
+            mark = "  ← bottleneck" if r["stage"] == bottleneck else ""
+            lines.append(
+                f"{r['stage']:<8}{r['workers']:>8}{r['processed']:>6}{r['failed']:>6}"
+                f"{r['items_per_min']:>8.1f}{r['avg_seconds']:>8.1f}{r['avg_queue_wait']:>8.1f}"
+                f"{r['max_queue_depth']:>6}{r['utilization']:>7.0%}{mark}"
+            )
+        return "\n".join(lines)
+
+# Stage functions for call analysis. Each takes and returns a dict; the
+# call ID set at decode tags every trace span of that call.
+
+def _decode(job):
+    from app.stt.audio import in_use, load_audio
+    item = {"path": job} if isinstance(job, str) else dict(job)
+    digest = item.get("audio_hash")
+    item["call_id"] = digest[:12] if digest else uuid.uuid4().hex[:12]
+    with call_context(item["call_id"]), in_use(item["path"]):
+        item["audio"] = load_audio(item["path"])  # Records its own audio.decode span
+    return item
+
+def _transcribe(item):
+    from app.stt.diarize import DIARIZE, diarize
+    from app.stt.audio import in_use
+    from app.stt.simple_whisper import SAMPLE_RATE, detect_language, get_model, model_for_language
+
+    audio = item.pop("audio")
+    with call_context(item["call_id"]), in_use(item["path"]):
+        # By path so the language is cached per file (the buffer is shared, not decoded again)
+        language = detect_language(item["path"], audio_hash=item.get("audio_hash"))
+        result = get_model(model_for_language(language)).transcribe(audio, language=language)
+        segments = diarize(audio, result["segments"]) if DIARIZE else result["segments"]
+    item.update({
+        "language": language,
+        "segments": segments,
+        "audio_seconds": len(audio) / SAMPLE_RATE
+    })
+    return item
+
+def _clean(item):
+    from app.stt.diarize import format_turns
+    from app.utils.call_stats import call_stats
+    from app.utils.text_cleaner import SegmentCleaner
+
+    with call_context(item["call_id"]), span("clean", segments=len(item["segments"])):
+        cleaner = SegmentCleaner()
+        item["transcript"] = format_turns([dict(seg, text=cleaner.feed(seg["text"])) for seg in item["segments"]])
+        item["stats"] = call_stats(item["segments"], item["audio_seconds"])
+    return item
+
+def _analyze(item):
+    from app.agents.simple_orchestrator import run_agents
+
+    with call_context(item["call_id"]):
+        item["analysis"] = run_agents(item["transcript"])
+    return item
+
+def build_call_pipeline(decode_workers: int = 2, stt_workers: int = 1, clean_workers: int = 1,
+                        agent_workers: int = 1, max_queue: int = 2) -> Pipeline:
+    """
+    Pipeline that turns audio paths (or {"path", "audio_hash"} dicts, to
+    reuse a digest the caller already has) into {"path", "call_id",
+    "language", "segments", "transcript", "stats", "analysis",
+    "audio_seconds"} dicts
+
+    STT and agents default to one worker each: one model copy apiece, kept
+    busy in parallel. max_queue bounds how many decoded calls wait in memory.
+    """
+    return Pipeline([
+        Stage("decode", _decode, decode_workers, max_queue),
+        Stage("stt", _transcribe, stt_workers, max_queue),
+        Stage("clean", _clean, clean_workers, max_queue),
+        Stage("agents", _analyze, agent_workers, max_queue),
+    ])
+
+class StreamingCall:
+    """
+    One call streamed through STT segment by segment: each segment is
+    cleaned once as it arrives, and finished windows go to the agents while
+    decoding continues (not when diarizing: speaker labels only exist once
+    the whole call is clustered, so early windows wouldn't match)
+
+        call = StreamingCall(path, audio_hash)
+        for segment, cleaned in call.transcribe():
+            ...
+        transcript, stats = call.finish()
+        results = run_agents(transcript, precomputed=call.early_results())
+    """
+
+    def __init__(self, path: str, audio_hash: str = None, analyze_early: bool = True):
+        from app.stt.diarize import DIARIZE
+        self.path = path
+        self.audio_hash = audio_hash
+        self.analyze_early = analyze_early and not DIARIZE
+        self.language = None
+        self.segments = []
+        self.texts = []  # Cleaned text per segment (speaker turns are built from these)
+        self.early = {}  # Window text -> future with that window's agent results
+        self._pool = ThreadPoolExecutor(max_workers=1)
+
+    def detect_language(self) -> str:
+        from app.stt.simple_whisper import detect_language
+        self.language = detect_language(self.path, audio_hash=self.audio_hash)
+        return self.language
+
+    def transcribe(self):
+        """Yield (segment, cleaned text) as each segment is decoded"""
+        from app.agents.chunker import WindowChunker, select_indices
+        from app.agents.simple_orchestrator import map_windows, max_windows
+        from app.stt.audio import duration, load_audio
+        from app.stt.simple_whisper import transcribe_stream
+        from app.utils.text_cleaner import SegmentCleaner
+
+        start = time.time()
+        total_seconds = duration(load_audio(self.path))  # Decoded once, shared with STT
+        language = self.language or self.detect_language()
+        cleaner = SegmentCleaner()
+        chunker = WindowChunker()  # Only the newest window is re-counted per segment
+        budget = max_windows()  # Same per-call token cap run_agents applies
+        finished = 0  # Windows the chunker has closed so far
+        clean_seconds = 0.0
+
+        for segment in transcribe_stream(self.path, language=language):
+            clean_start = time.time()
+            cleaned = cleaner.feed(segment["text"])
+            clean_seconds += time.time() - clean_start
+            self.segments.append(segment)
+            self.texts.append(cleaned)
+
+            # Start the agents on finished windows, but only those the final
+            # window selection is expected to keep (window count projected
+            # from how far into the audio we are)
+            if self.analyze_early and cleaned:
+                for window in chunker.feed(cleaned):
+                    finished += 1
+                    projected = max(finished, round(finished * total_seconds / max(segment["end"], 1.0)))
+                    if finished - 1 in select_indices(projected, budget) and window not in self.early:
+                        self.early[window] = self._pool.submit(tracing.bind(map_windows), [window])
+            yield segment, cleaned
+
+        tracing.record("clean", clean_seconds, segments=sum(1 for text in self.texts if text))
+        tracing.record("call.transcribe", time.time() - start, language=language)
+
+    def finish(self) -> tuple:
+        """(transcript, call stats) once transcribe() is done; diarizes first if DIARIZE is on"""
+        from app.stt.audio import duration, load_audio
+        from app.stt.diarize import DIARIZE, diarize, format_turns
+        from app.utils.call_stats import call_stats
+
+        # Same buffer transcribe_stream decoded, so the true length is free
+        audio = load_audio(self.path)
+        segments = diarize(audio, self.segments) if DIARIZE else self.segments
+        transcript = format_turns([dict(seg, text=text) for seg, text in zip(segments, self.texts)])
+        return transcript, call_stats(segments, duration(audio))
+
+    def early_results(self) -> dict:
+        """{window text: agent results} for the windows mapped during transcription"""
+        precomputed = {}
+        for window, future in self.early.items():
+            try:
+                precomputed[window] = future.result()[0]
+            except Exception as e:
+                print(f"⚠️ Early analysis failed: {e}")
+        return precomputed
+
+    def close(self):
+        """Stop accepting early windows (already queued ones still finish)"""
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,233 @@
+"""
+Shared local model server
+
+One process owns one copy of Whisper and the LLM; Streamlit sessions,
+replicas and batch workers talk to it over localhost HTTP instead of each
+loading their own. Start it, then point clients at it:
+
+    python -m app.server --port 8765
+    MODEL_SERVER_URL=http://127.0.0.1:8765 streamlit run app/main.py
+
+Identical requests that arrive while one is already running (e.g. two
+sessions analyzing the same upload) are coalesced and share its result;
+different prompts are batched together by the FastLLM scheduler.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils.model_client import DEADLINE_HEADER, decode_audio
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+class _Shared:
+    """One in-flight run and the latest deadline of the clients waiting on it"""
+
+    def __init__(self, deadline):
+        self.future = Future()
+        self.deadline = deadline  # time() value; None = some client waits indefinitely
+
+    def join(self, deadline):
+        if self.deadline is not None:
+            self.deadline = None if deadline is None else max(self.deadline, deadline)
+
+class Coalescer:
+    """Run each distinct request once; concurrent duplicates wait for the same result"""
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def run(self, key: str, fn, deadline: float = None):
+        """
+        fn(latest) runs once per key; latest() is the latest deadline of all
+        waiting clients, so the shared run is only cancelled once nobody
+        is waiting for it any more
+        """
+        with self._lock:
+            shared = self._inflight.get(key)
+            owner = shared is None
+            if owner:
+                shared = self._inflight[key] = _Shared(deadline)
+                self.calls += 1
+            else:
+                shared.join(deadline)
+                self.coalesced += 1
+
+        if not owner:
+            return shared.future.result()
+
+        try:
+            shared.future.set_result(fn(lambda: shared.deadline))
+        except Exception as e:
+            shared.future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return shared.future.result()
+
+_coalescer = Coalescer()
+
+def _llm_call(name: str, *args):
+    # Goes through the FastLLM scheduler, which batches prompts across sessions
+    from app.agents import fast_llm
+    return getattr(fast_llm, name)(*args)
+
+def _within(latest, route, payload: dict) -> dict:
+    """Run a route as a cancel scope that ends when the last waiting client gives up"""
+    from app.agents.fast_llm import cancel_scope
+    if latest() is None:
+        return route(payload)
+    with cancel_scope(lambda: latest() is not None and time.time() >= latest(), latest()):
+        return route(payload)
+
+def _transcribe(payload: dict) -> dict:
+    from app.stt.simple_whisper import get_model
+    return get_model(payload["model"]).transcribe(
+        decode_audio(payload),
+        language=payload.get("language") or "en",
+        initial_prompt=payload.get("initial_prompt")
+    )
+
+def _detect_language(payload: dict) -> dict:
+    from app.stt.simple_whisper import get_model
+    language, probability = get_model(payload["model"]).detect_language(decode_audio(payload))
+    return {"language": language, "probability": probability}
+
+# Payload keys each route needs (STT routes also need "path" or "audio_b64")
+REQUIRED = {
+    "/llm/generate": ("prompt", "max_tokens"),
+    "/llm/generate_batch": ("prompts", "max_tokens"),
+    "/llm/generate_with_prefix": ("prefix", "suffixes", "max_tokens"),
+    "/llm/generate_fields": ("prompt", "fields"),
+    "/stt/transcribe": ("model",),
+    "/stt/detect_language": ("model",),
+}
+
+def _validate(path: str, payload):
+    """Raise ValueError for a payload the route can't use"""
+    if not isinstance(payload, dict):
+        raise ValueError("body must be a JSON object")
+    missing = [key for key in REQUIRED[path] if key not in payload]
+    if path.startswith("/stt/") and "path" not in payload and "audio_b64" not in payload:
+        missing.append("path or audio_b64")
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+ROUTES = {
+    "/llm/generate": lambda p: {
+        "text": _llm_call("run_llm", p["prompt"], p["max_tokens"], p.get("stop"), p.get("fields"))
+    },
+    "/llm/generate_batch": lambda p: {
+        "texts": _llm_call("run_llm_batch", p["prompts"], p["max_tokens"], p.get("stop"), p.get("fields"))
+    },
+    "/llm/generate_with_prefix": lambda p: {
+        "texts": _llm_call(
+            "run_llm_with_prefix", p["prefix"], p["suffixes"], p["max_tokens"], p.get("stop"), p.get("fields")
+        )
+    },
+    "/llm/generate_fields": lambda p: {"text": _llm_call("run_llm_fields", p["prompt"], p["fields"])},
+    "/stt/transcribe": _transcribe,
+    "/stt/detect_language": _detect_language,
+}
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The client stopped waiting (its deadline passed)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            from app.utils.tracing import render_prometheus
+            data = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if self.path != "/health":
+            return self._reply(404, {"error": f"unknown path {self.path}"})
+        from app.agents import fast_llm
+        from app.stt import simple_whisper
+        self._reply(200, {
+            "status": "ok",
+            "whisper_models": sorted(simple_whisper._models),
+            "llm_loaded": fast_llm._llm_instance is not None,
+            "llm_version": fast_llm.llm_version(),
+            "calls": _coalescer.calls,
+            "coalesced": _coalescer.coalesced,
+            "llm_batching": fast_llm._scheduler.stats() if fast_llm._scheduler else None,
+        })
+
+    def do_POST(self):
+        route = ROUTES.get(self.path)
+        if route is None:
+            return self._reply(404, {"error": f"unknown path {self.path}"})
+
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            payload = json.loads(body)
+            _validate(self.path, payload)
+            seconds = self.headers.get(DEADLINE_HEADER)
+            deadline = time.time() + float(seconds) if seconds else None
+        except ValueError as e:  # Bad Content-Length, JSON, payload or deadline
+            return self._reply(400, {"error": f"bad request: {e}"})
+
+        # The deadline isn't part of the key: duplicates share one run, which
+        # is only cancelled once every waiting client's deadline has passed
+        key = hashlib.sha256(self.path.encode("utf-8") + b"\0" + body).hexdigest()
+        try:
+            self._reply(200, _coalescer.run(key, lambda latest: _within(latest, route, payload), deadline))
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for model load messages
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, warmup: bool = True):
+    """Load the models and serve until interrupted"""
+    # The server itself must load models, not forward to another server
+    os.environ.pop("MODEL_SERVER_URL", None)
+
+    if warmup:
+        from app.warmup import warm_up
+        warm_up()
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"🛰️ Model server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one shared copy of Whisper and the LLM")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-warmup", action="store_true", help="Load models on first request instead")
+    args = parser.parse_args()
+    serve(args.host, args.port, warmup=not args.no_warmup)
+
+if __name__ == "__main__":
+    main()
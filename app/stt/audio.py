@@ -0,0 +1,150 @@
+"""
+Decode-once audio loading
+
+Every consumer (language ID, Whisper, chunking, stats) asks load_audio()
+for the same file and gets the same 16 kHz mono float32 buffer, so a call
+is decoded by ffmpeg once instead of once per step. The buffers are
+read-only and shared without copies:
+
+- short calls stay in a small in-process LRU
+- long calls are written once as raw float32 to the decoded-audio spool
+  (own directory and quota, separate from uploads) and memory-mapped, so other processes (parallel STT workers) map the
+  same pages instead of decoding or pickling the audio again
+
+numpy/soundfile/ffmpeg are imported lazily.
+"""
+import hashlib
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+SAMPLE_RATE = 16000
+
+# Calls longer than this are memory-mapped instead of kept on the heap
+MEMMAP_SECONDS = 600
+
+# Decoded in-memory buffers kept per process
+MAX_BUFFERS = 2
+
+_buffers = OrderedDict()  # (path, mtime, size) -> array
+_lock = threading.Lock()
+
+def _decode_soundfile(path: str):
+    """Fast path without a subprocess: files that are already 16 kHz"""
+    import numpy as np
+    import soundfile as sf
+
+    info = sf.info(path)
+    if info.samplerate != SAMPLE_RATE:
+        return None
+    audio = sf.read(path, dtype="float32", always_2d=True)[0]
+    return np.ascontiguousarray(audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0])
+
+def _decode_ffmpeg(path: str):
+    """Anything ffmpeg reads, resampled to 16 kHz mono float32"""
+    import numpy as np
+
+    try:
+        import ffmpeg
+        out, _ = (
+            ffmpeg.input(path, threads=0)
+            .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=SAMPLE_RATE)
+            .run(cmd=["ffmpeg", "-nostdin"], capture_stdout=True, capture_stderr=True)
+        )
+    except ImportError:
+        cmd = [
+            "ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+            "-f", "f32le", "-ac", "1", "-acodec", "pcm_f32le", "-ar", str(SAMPLE_RATE), "-"
+        ]
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.float32)
+
+def decode(path: str):
+    """Decode a file to 16 kHz mono float32 (no caching)"""
+    try:
+        audio = _decode_soundfile(path)
+        if audio is not None:
+            return audio
+    except Exception:
+        pass  # Not a libsndfile format (mp3/m4a on older libsndfile) - use ffmpeg
+    return _decode_ffmpeg(path)
+
+def _memmap_path(key: tuple) -> str:
+    from app.utils.spool import get_decoded_spool
+    digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(get_decoded_spool().spool_dir, f"{digest}.f32")
+
+def _memmap(path: str):
+    import numpy as np
+    return np.memmap(path, dtype=np.float32, mode="r")
+
+@contextmanager
+def in_use(path: str):
+    """
+    Keep a call's files from spool eviction inside the block: the upload
+    (if it is spooled) and its decoded memmap (if it is long enough to have one)
+    """
+    from app.utils.spool import get_decoded_spool, get_spool
+    realpath = os.path.realpath(path)
+    st = os.stat(realpath)
+    with get_spool().pin(realpath), get_decoded_spool().pin(_memmap_path((realpath, st.st_mtime_ns, st.st_size))):
+        yield
+
+def load_audio(source):
+    """
+    Shared 16 kHz mono float32 buffer for a file (decoded at most once)
+
+    Args:
+        source: Audio file path, or an array (returned as float32 as-is)
+
+    Returns:
+        Read-only numpy array (np.memmap for calls over MEMMAP_SECONDS)
+    """
+    import numpy as np
+
+    if not isinstance(source, (str, os.PathLike)):
+        return np.asarray(source, dtype=np.float32)
+
+    path = os.path.realpath(source)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+
+    with _lock:
+        audio = _buffers.get(key)
+        if audio is not None:
+            _buffers.move_to_end(key)
+            return audio
+
+    # A long call decoded earlier (possibly by another process)
+    mapped = _memmap_path(key)
+    if os.path.exists(mapped):
+        return _memmap(mapped)
+
+    from app.utils.tracing import span
+    with span("audio.decode", path=path):
+        audio = decode(path)
+
+    if len(audio) > MEMMAP_SECONDS * SAMPLE_RATE:
+        tmp_path = f"{mapped}.{os.getpid()}.tmp"
+        audio.tofile(tmp_path)
+        os.replace(tmp_path, mapped)
+        from app.utils.spool import get_decoded_spool
+        get_decoded_spool().gc()  # Keep decoded audio under its own quota
+        return _memmap(mapped)
+
+    audio.flags.writeable = False  # Shared between consumers
+    with _lock:
+        _buffers[key] = audio
+        while len(_buffers) > MAX_BUFFERS:
+            _buffers.popitem(last=False)
+    return audio
+
+def head(audio, seconds: float):
+    """First seconds of a buffer (a view, no copy)"""
+    return audio[:int(seconds * SAMPLE_RATE)]
+
+def duration(audio) -> float:
+    """Length of a 16 kHz buffer in seconds"""
+    return len(audio) / SAMPLE_RATE
@@ -0,0 +1,158 @@
+"""
+Pluggable speech-to-text engines
+
+Every engine takes a path or a 16 kHz mono float32 array and returns
+{"text": str, "segments": [{"start", "end", "text"}]}.
+"""
+import importlib.util
+import os
+import threading
+from app.utils.tracing import span
+
+# Selected with STT_BACKEND; falls back to plain whisper if the engine is unavailable
+DEFAULT_ENGINE = os.environ.get("STT_BACKEND", "whisper")
+
+# Decoding settings per engine. Greedy decoding everywhere so results are
+# comparable; re-run benchmarks/stt_backends.py before changing these.
+ENGINE_CONFIGS = {
+    "whisper": {"fp16": False, "beam_size": None},
+    "whisper-int8": {"fp16": False, "beam_size": None},
+    "faster-whisper": {"compute_type": "int8", "beam_size": 1, "cpu_threads": 0},
+}
+
+class WhisperEngine:
+    """openai-whisper at fp32 on CPU (the original behaviour)"""
+
+    name = "whisper"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.config = ENGINE_CONFIGS[self.name]
+        self.model = self._load()
+        # openai-whisper installs KV-cache hooks on the model for each decode,
+        # so concurrent calls on one instance must be serialized
+        self._lock = threading.Lock()
+
+    def _load(self):
+        import whisper
+        return whisper.load_model(self.model_name, device="cpu")
+
+    def transcribe(self, audio, language='en', initial_prompt=None) -> dict:
+        with self._lock, span("stt.transcribe", engine=self.name, model=self.model_name,
+                              audio_seconds=_seconds(audio)):
+            result = self.model.transcribe(
+                audio,
+                language=language,
+                fp16=self.config["fp16"],
+                beam_size=self.config["beam_size"],
+                verbose=False,  # Don't print progress
+                initial_prompt=initial_prompt
+            )
+        segments = [
+            {"start": seg["start"], "end": seg["end"], "text": seg.get("text", "").strip()}
+            for seg in result.get("segments", [])
+            if seg.get("text", "").strip()
+        ]
+        return {"text": result.get("text", "").strip(), "segments": segments}
+
+    def detect_language(self, head) -> tuple:
+        """Language ID on (up to) the first 30 s of 16 kHz audio -> (code, probability)"""
+        import whisper
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(head), n_mels=self.model.dims.n_mels)
+        with self._lock, span("stt.language", engine=self.name, model=self.model_name):
+            _, probs = self.model.detect_language(mel.to(self.model.device))
+        language = max(probs, key=probs.get)
+        return language, probs[language]
+
+class QuantizedWhisperEngine(WhisperEngine):
+    """openai-whisper with int8 dynamic quantization of the Linear layers"""
+
+    name = "whisper-int8"
+
+    def _load(self):
+        import torch
+        model = super()._load()
+
+        # whisper wraps nn.Linear in its own subclass, which quantize_dynamic
+        # skips; turn them back into plain Linear layers first (same weights)
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+                module.__class__ = torch.nn.Linear
+
+        # In place, so the fp32 model isn't deep-copied first (2x peak RAM)
+        torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return model
+
+class FasterWhisperEngine:
+    """CTranslate2 faster-whisper (only if the package is installed)"""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str):
+        from faster_whisper import WhisperModel
+
+        self.model_name = model_name
+        self.config = ENGINE_CONFIGS[self.name]
+        self.model = WhisperModel(
+            model_name,
+            device="cpu",
+            compute_type=self.config["compute_type"],
+            cpu_threads=self.config["cpu_threads"]
+        )
+
+    def transcribe(self, audio, language='en', initial_prompt=None) -> dict:
+        with span("stt.transcribe", engine=self.name, model=self.model_name, audio_seconds=_seconds(audio)):
+            segments, _info = self.model.transcribe(
+                audio,
+                language=language,
+                beam_size=self.config["beam_size"],
+                initial_prompt=initial_prompt
+            )
+            # Decoding happens while the segment generator is consumed
+            segments = [
+                {"start": seg.start, "end": seg.end, "text": seg.text.strip()}
+                for seg in segments
+                if seg.text.strip()
+            ]
+        return {"text": " ".join(seg["text"] for seg in segments), "segments": segments}
+
+    def detect_language(self, head) -> tuple:
+        """Language ID on (up to) the first 30 s of 16 kHz audio -> (code, probability)"""
+        # Detection runs eagerly inside transcribe(); segments stay an unconsumed generator
+        with span("stt.language", engine=self.name, model=self.model_name):
+            _segments, info = self.model.transcribe(head, language=None, beam_size=1)
+        return info.language, info.language_probability
+
+def _seconds(audio):
+    """Length of a 16 kHz array in seconds (None for paths)"""
+    return None if isinstance(audio, str) else round(len(audio) / 16000, 2)
+
+ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    QuantizedWhisperEngine.name: QuantizedWhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+def available_engines() -> list:
+    """Engines whose dependencies are importable here"""
+    names = []
+    if importlib.util.find_spec("whisper") is not None:
+        names.append(WhisperEngine.name)
+        if importlib.util.find_spec("torch") is not None:
+            names.append(QuantizedWhisperEngine.name)
+    if importlib.util.find_spec("faster_whisper") is not None:
+        names.append(FasterWhisperEngine.name)
+    return names
+
+def resolve_engine(name: str) -> str:
+    """Engine load_engine(name) will actually create (whisper if name isn't available)"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown STT backend {name!r}, expected one of {list(ENGINES)}")
+    return name if name in available_engines() else WhisperEngine.name
+
+def load_engine(name: str, model_name: str):
+    """Create an engine by name, falling back to plain whisper"""
+    resolved = resolve_engine(name)
+    if resolved != name:
+        print(f"⚠️ STT backend {name} not available, using {resolved}")
+    return ENGINES[resolved](model_name)
@@ -0,0 +1,261 @@
+"""
+CPU speaker diarization for Whisper segments
+
+Each segment gets a voice embedding (mean and spread of its MFCCs, which
+are computed once over the shared decoded buffer), the embeddings are
+clustered with k-means, and clusters are named by talk time: the speaker
+who talks most is taken to be the rep. Everything is numpy, so an hour
+of audio diarizes in seconds without another model to download.
+
+k-means always returns k clusters, even for a single voice or a noisy
+line, so the split is only kept when the clusters are well separated
+(silhouette score); otherwise the segments stay unlabeled and the
+transcript is plain text.
+
+Labels are per Whisper segment: a segment that spans a speaker change
+goes to whoever dominates it.
+
+numpy is imported lazily.
+"""
+import os
+from app.stt.audio import SAMPLE_RATE
+
+# Opt-in with SALES_AI_DIARIZE=1 (off: plain-text transcripts as before).
+# Speakers are only known once the whole call is clustered, so turning it
+# on skips the UI's early analysis during transcription, and agents that
+# read only one speaker's turns no longer share the prefix KV cache.
+DIARIZE = os.environ.get("SALES_AI_DIARIZE", "0") == "1"
+
+# Speakers per call: rep + customer
+NUM_SPEAKERS = int(os.environ.get("SALES_AI_SPEAKERS", "2"))
+
+# Minimum mean silhouette (-1..1) for the speaker split to be used
+MIN_SILHOUETTE = float(os.environ.get("SALES_AI_DIARIZE_MIN_SILHOUETTE", "0.15"))
+
+# Part of the transcript cache key (labeled and plain transcripts differ)
+DIARIZE_VERSION = f"mfcc-kmeans-2/{NUM_SPEAKERS}/{MIN_SILHOUETTE:g}" if DIARIZE else "off"
+
+# Speaker names by talk time; further speakers are "Speaker 3", ...
+REP = "Rep"
+CUSTOMER = "Customer"
+
+# MFCC framing: 25 ms windows every 10 ms
+FRAME = 400
+HOP = 160
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20
+FRAMES_PER_SECOND = SAMPLE_RATE // HOP
+
+# Frames per FFT block (bounds memory on long calls)
+BLOCK_FRAMES = 6000
+
+KMEANS_RESTARTS = 5
+KMEANS_ITERATIONS = 50
+
+# Points the silhouette is computed on (evenly spaced; it is O(n^2))
+SILHOUETTE_SAMPLE = 1000
+
+_filters = None
+
+def _mel_filters():
+    """(N_MELS, N_FFT // 2 + 1) triangular mel filterbank"""
+    import numpy as np
+    global _filters
+    if _filters is None:
+        def mel(hz):
+            return 2595 * np.log10(1 + hz / 700)
+
+        def hz(m):
+            return 700 * (10 ** (m / 2595) - 1)
+
+        bins = np.floor((N_FFT + 1) * hz(np.linspace(mel(0), mel(SAMPLE_RATE / 2), N_MELS + 2)) / SAMPLE_RATE).astype(int)
+        filters = np.zeros((N_MELS, N_FFT // 2 + 1), dtype=np.float32)
+        for i in range(N_MELS):
+            left, center, right = bins[i], bins[i + 1], bins[i + 2]
+            filters[i, left:center] = (np.arange(left, center) - left) / max(center - left, 1)
+            filters[i, center:right] = (right - np.arange(center, right)) / max(right - center, 1)
+        _filters = filters
+    return _filters
+
+def _dct_matrix():
+    """(N_MFCC, N_MELS) orthonormal DCT-II"""
+    import numpy as np
+    n = np.arange(N_MELS)
+    dct = np.cos(np.pi / N_MELS * (n + 0.5)[None, :] * np.arange(N_MFCC)[:, None]) * np.sqrt(2 / N_MELS)
+    dct[0] /= np.sqrt(2)
+    return dct.astype(np.float32)
+
+def mfcc(audio):
+    """
+    MFCCs of a 16 kHz buffer
+
+    Returns:
+        (frames, N_MFCC) float32, one row per 10 ms
+    """
+    import numpy as np
+
+    if len(audio) < FRAME:
+        return np.zeros((0, N_MFCC), dtype=np.float32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(audio, FRAME)[::HOP]  # A view, no copy
+    window = np.hanning(FRAME).astype(np.float32)
+    filters, dct = _mel_filters(), _dct_matrix()
+    out = np.empty((len(frames), N_MFCC), dtype=np.float32)
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES] * window
+        power = np.abs(np.fft.rfft(block, N_FFT)) ** 2
+        out[start:start + len(block)] = np.log(power.astype(np.float32) @ filters.T + 1e-10) @ dct.T
+    return out
+
+def segment_embeddings(features, segments: list):
+    """
+    One embedding per segment: mean and std of its MFCCs (c1..), over the
+    louder half of its frames so pauses inside a segment don't dominate
+
+    Returns:
+        (segments, 2 * (N_MFCC - 1)) float array, z-scored per dimension
+    """
+    import numpy as np
+
+    # Cepstral mean normalization over the call removes the channel
+    features = features - features.mean(axis=0) if len(features) else features
+    embeddings = np.zeros((len(segments), 2 * (N_MFCC - 1)))
+    for i, seg in enumerate(segments):
+        start = int(seg["start"] * FRAMES_PER_SECOND)
+        end = max(int(seg["end"] * FRAMES_PER_SECOND), start + 1)
+        frames = features[start:end]
+        if len(frames) == 0:
+            continue
+        frames = frames[frames[:, 0] >= np.median(frames[:, 0])]
+        embeddings[i] = np.concatenate((frames[:, 1:].mean(axis=0), frames[:, 1:].std(axis=0)))
+
+    spread = embeddings.std(axis=0)
+    return (embeddings - embeddings.mean(axis=0)) / np.where(spread > 0, spread, 1)
+
+def kmeans(points, k: int, restarts: int = KMEANS_RESTARTS, iterations: int = KMEANS_ITERATIONS, seed: int = 0):
+    """
+    k-means++ with a few restarts (deterministic for a given seed)
+
+    Returns:
+        Cluster index per point
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    best_labels, best_inertia = None, np.inf
+    for _ in range(restarts):
+        # k-means++ seeding
+        centers = [points[rng.integers(len(points))]]
+        for _ in range(1, k):
+            dist = ((points[:, None, :] - np.array(centers)[None]) ** 2).sum(axis=2).min(axis=1)
+            total = dist.sum()
+            p = dist / total if total > 0 else None
+            centers.append(points[rng.choice(len(points), p=p)])
+        centers = np.array(centers)
+
+        for _ in range(iterations):
+            dist = ((points[:, None, :] - centers[None]) ** 2).sum(axis=2)
+            labels = dist.argmin(axis=1)
+            moved = np.array([points[labels == j].mean(axis=0) if (labels == j).any() else centers[j]
+                              for j in range(k)])
+            if np.allclose(moved, centers):
+                break
+            centers = moved
+
+        inertia = dist[np.arange(len(points)), labels].sum()
+        if inertia < best_inertia:
+            best_labels, best_inertia = labels, inertia
+    return best_labels
+
+def silhouette(points, labels) -> float:
+    """
+    Mean silhouette score: near 1 for well separated clusters, near 0 (or
+    below) when the points could as well belong to another cluster
+    """
+    import numpy as np
+
+    if len(points) > SILHOUETTE_SAMPLE:
+        keep = np.linspace(0, len(points) - 1, SILHOUETTE_SAMPLE).astype(int)
+        points, labels = points[keep], labels[keep]
+    clusters = np.unique(labels)
+    if len(clusters) < 2:
+        return 0.0
+
+    sq = (points ** 2).sum(axis=1)
+    dist = np.sqrt(np.maximum(sq[:, None] + sq[None] - 2 * points @ points.T, 0))
+    # Mean distance from each point to every cluster (own cluster without itself)
+    mean = np.empty((len(points), len(clusters)))
+    for j, cluster in enumerate(clusters):
+        members = labels == cluster
+        size = members.sum()
+        mean[:, j] = dist[:, members].sum(axis=1) / np.where(members, max(size - 1, 1), size)
+    own = np.searchsorted(clusters, labels)
+    a = mean[np.arange(len(points)), own]
+    mean[np.arange(len(points)), own] = np.inf
+    b = mean.min(axis=1)
+    sizes = np.bincount(own, minlength=len(clusters))
+    # Points alone in their cluster score 0 by convention
+    scores = np.where(sizes[own] > 1, (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0.0)
+    return float(scores.mean())
+
+def _names(labels, seconds, k: int) -> list:
+    """Cluster index -> speaker name, most talk time first"""
+    import numpy as np
+    talk = np.bincount(labels, weights=seconds, minlength=k)
+    names = [REP, CUSTOMER] + [f"Speaker {i + 1}" for i in range(2, k)]
+    by_talk = {int(cluster): names[rank] for rank, cluster in enumerate(np.argsort(-talk, kind="stable"))}
+    return [by_talk[int(label)] for label in labels]
+
+def diarize(audio, segments: list, num_speakers: int = NUM_SPEAKERS) -> list:
+    """
+    Label transcript segments by speaker
+
+    Args:
+        audio: 16 kHz mono float32 buffer the segments were transcribed from
+        segments: [{"start", "end", "text"}]
+        num_speakers: Number of voices to separate
+
+    Returns:
+        Copies of the segments with a "speaker" key (REP, CUSTOMER, ...),
+        or unlabeled copies when the voices can't be told apart
+    """
+    import numpy as np
+    from app.utils.tracing import span
+
+    if not segments:
+        return []
+    k = max(1, min(num_speakers, len(segments)))
+    seconds = np.array([seg["end"] - seg["start"] for seg in segments], dtype=np.float64)
+
+    with span("stt.diarize", segments=len(segments), audio_seconds=len(audio) / SAMPLE_RATE) as attrs:
+        if k == 1:
+            attrs["silhouette"] = None
+            return [dict(seg) for seg in segments]  # Nothing to separate
+        points = segment_embeddings(mfcc(audio), segments)
+        labels = kmeans(points, k)
+        score = attrs["silhouette"] = round(silhouette(points, labels), 3)
+        if score < MIN_SILHOUETTE:
+            print(f"⚠️ Speakers not separable (silhouette {score:.2f}), keeping the transcript unlabeled")
+            return [dict(seg) for seg in segments]
+        names = _names(labels, seconds, k)
+    return [dict(seg, speaker=name) for seg, name in zip(segments, names)]
+
+def format_turns(segments: list) -> str:
+    """
+    Transcript text with speaker turns, e.g. "Rep: Hello. Customer: Hi."
+
+    Consecutive segments of one speaker are merged into one turn; segments
+    without a "speaker" are joined as plain text. Empty texts are skipped.
+    """
+    turns = []
+    for seg in segments:
+        text = seg["text"].strip()
+        if not text:
+            continue
+        speaker = seg.get("speaker")
+        if turns and turns[-1][0] == speaker:
+            turns[-1][1].append(text)
+        else:
+            turns.append((speaker, [text]))
+    return " ".join(f"{speaker}: {' '.join(parts)}" if speaker else " ".join(parts) for speaker, parts in turns)
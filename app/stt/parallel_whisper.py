@@ -0,0 +1,163 @@
+"""
+Parallel Whisper transcription over silence-split chunks
+
+Worker pools are kept per (engine, model) and reused across calls, so
+each worker process loads its model once rather than once per call.
+"""
+import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+from app.stt.audio import load_audio
+from app.stt.simple_whisper import ENGINE, SAMPLE_RATE, detect_language, model_for_language
+
+# Chunking defaults: aim for ~60 s chunks, cut at the quietest point near the target
+CHUNK_SECONDS = 60
+SEARCH_SECONDS = 10
+FRAME_MS = 30
+
+# Per-worker model (loaded once by the pool initializer)
+_worker_model = None
+
+# (engine, model) -> (workers, pool), reused across calls
+_pools = {}
+_pools_lock = threading.Lock()
+
+def split_on_silence(audio, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS,
+                     search_seconds=SEARCH_SECONDS, frame_ms=FRAME_MS) -> list:
+    """
+    Split audio into chunks at low-energy frames
+
+    Args:
+        audio: Mono float32 samples
+        sample_rate: Samples per second
+        chunk_seconds: Target chunk length
+        search_seconds: How far around each target to look for silence
+        frame_ms: Energy frame length
+
+    Returns:
+        List of (start_sample, end_sample) covering the whole buffer
+    """
+    total = len(audio)
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = total // frame
+    if n_frames == 0 or total <= chunk_seconds * sample_rate:
+        return [(0, total)]
+
+    # Frame RMS energy in one vectorized pass
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+
+    frames_per_chunk = int(chunk_seconds * 1000 / frame_ms)
+    search = int(search_seconds * 1000 / frame_ms)
+
+    bounds = []
+    start_frame = 0
+    while n_frames - start_frame > frames_per_chunk + search:
+        target = start_frame + frames_per_chunk
+        lo, hi = target - search, target + search
+        cut = lo + int(np.argmin(energy[lo:hi]))
+        bounds.append((start_frame * frame, cut * frame))
+        start_frame = cut
+
+    bounds.append((start_frame * frame, total))
+    return bounds
+
+def _init_worker(engine, model_name, threads):
+    """Pool initializer: pin torch threads and preload one model per process"""
+    global _worker_model
+    import torch
+    from app.stt.backends import load_engine
+
+    torch.set_num_threads(threads)
+    _worker_model = load_engine(engine, model_name)
+
+def get_pool(engine: str, model_name: str, workers: int) -> ProcessPoolExecutor:
+    """Worker pool for one engine + model, created on first use (recreated if workers changes)"""
+    with _pools_lock:
+        size, pool = _pools.get((engine, model_name), (None, None))
+        if pool is None or size != workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            cpus = os.cpu_count() or 1
+            # spawn: forking a process that already holds torch threads can deadlock
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(engine, model_name, max(1, cpus // workers))
+            )
+            _pools[(engine, model_name)] = (workers, pool)
+        return pool
+
+def shutdown_pools():
+    """Stop every worker pool (they otherwise live until the process exits)"""
+    with _pools_lock:
+        for _, pool in _pools.values():
+            pool.shutdown(wait=False)
+        _pools.clear()
+
+def _transcribe_chunk(job):
+    """Transcribe one chunk and shift its timestamps to call time"""
+    index, start_sample, chunk, language = job
+    if isinstance(chunk, tuple):
+        # (memmap file, start, end): map the parent's decoded buffer, no copy over the pipe
+        import numpy as np
+        path, start, end = chunk
+        chunk = np.memmap(path, dtype=np.float32, mode="r")[start:end]
+    result = _worker_model.transcribe(chunk, language=language)
+    offset = start_sample / SAMPLE_RATE
+    segments = [
+        {"start": offset + seg["start"], "end": offset + seg["end"], "text": seg["text"]}
+        for seg in result["segments"]
+    ]
+    return index, segments
+
+def stream_parallel(audio, workers: int = None, chunk_seconds: int = CHUNK_SECONDS,
+                    language: str = None):
+    """
+    Transcribe a long recording across a process pool, yielding segments
+    in call order as soon as their chunk (and every earlier one) is done
+
+    Args:
+        audio: Path to audio file, or a 16 kHz mono float32 array
+        workers: Processes in the (reused) pool (default: CPU count)
+        chunk_seconds: Target chunk length
+        language: Whisper language code; detected from the first 30 s if not given
+
+    Yields:
+        Segments ({"start", "end", "text"}) in call order
+    """
+    language = language or detect_language(audio)
+    audio = load_audio(audio)
+    bounds = split_on_silence(audio, chunk_seconds=chunk_seconds)
+
+    # Not capped by the chunk count, so calls of any length share one pool
+    workers = max(1, workers or os.cpu_count() or 1)
+    print(f"📝 Transcribing {len(bounds)} chunks on {min(workers, len(bounds))} workers")
+
+    # Long calls are memory-mapped: workers map the same file instead of receiving copies
+    if isinstance(audio, np.memmap):
+        jobs = [(i, start, (audio.filename, start, end), language) for i, (start, end) in enumerate(bounds)]
+    else:
+        jobs = [(i, start, audio[start:end], language) for i, (start, end) in enumerate(bounds)]
+
+    key = (ENGINE, model_for_language(language))
+    pool = get_pool(*key, workers)
+    try:
+        # map() submits every chunk up front and returns results in order
+        for _, segments in pool.map(_transcribe_chunk, jobs):
+            yield from segments
+    except BrokenProcessPool:
+        with _pools_lock:
+            if _pools.get(key, (None, None))[1] is pool:
+                del _pools[key]  # A worker died; the next call starts a fresh pool
+        raise
+
+def transcribe_parallel(audio, workers: int = None, chunk_seconds: int = CHUNK_SECONDS,
+                        language: str = None) -> list:
+    """All segments of stream_parallel() as one list"""
+    return list(stream_parallel(audio, workers, chunk_seconds, language))
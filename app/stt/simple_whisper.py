@@ -1,50 +1,204 @@
 """
 Simple Whisper transcription
+
+whisper/torch/numpy are imported lazily so the UI can import this module
+without paying for them. Audio is decoded once per file by app.stt.audio
+and shared by language ID and transcription.
 """
-import whisper
+import os
+import threading
 import warnings
+from app.stt.audio import SAMPLE_RATE, duration, head, load_audio
+from app.stt.backends import DEFAULT_ENGINE, load_engine, resolve_engine
+from app.utils.model_client import RemoteEngine, server_url
+from app.utils.result_cache import get_cache, hash_file, make_key
+from app.utils.tracing import span
 warnings.filterwarnings("ignore")
 
-# Cache model globally
-_model = None
+# Model size (also used for language detection)
+MODEL_NAME = "base"
+
+# Model size per detected language; base is too weak for Indic languages
+LANGUAGE_MODELS = {
+    "en": "base",
+    "hi": "small",
+    "mr": "small",
+}
+FALLBACK_MODEL = "small"
+
+# Engine that actually loads (after the whisper fallback), so transcripts
+# from a fallback engine aren't cached under the requested engine's name
+ENGINE = resolve_engine(DEFAULT_ENGINE)
+
+# Whisper processes per call; >1 transcribes ~60 s silence-split chunks in
+# a reused process pool (app/stt/parallel_whisper.py) instead of one
+# 30 s window after another. Not used with a model server.
+STT_WORKERS = max(1, int(os.environ.get("SALES_AI_STT_WORKERS", "1")))
+
+# Engine + model + routing + windowing version (part of the result cache key)
+STT_VERSION = f"{ENGINE}/{MODEL_NAME}/langid-1/f32/" + ("chunks-60" if STT_WORKERS > 1 else "silence-win-1")
+
+# Whisper works on 16 kHz audio (SAMPLE_RATE) in 30 s windows
+WINDOW_SECONDS = 30
+
+# Streamed windows end at the quietest point of their last this-many seconds
+SILENCE_SEARCH_SECONDS = 5
+
+# Cache models globally (one per size)
+_models = {}
+_models_lock = threading.Lock()  # Warm-up thread and requests must not load twice
+
+def get_model(model_name: str = MODEL_NAME):
+    """Load the selected STT engine once per model size (cached)"""
+    if server_url():
+        return RemoteEngine(model_name)
+    with _models_lock:
+        if model_name not in _models:
+            print(f"🔊 Loading Whisper {model_name} ({ENGINE}, first time may take a minute)...")
+            try:
+                with span("stt.load", engine=ENGINE, model=model_name):
+                    _models[model_name] = load_engine(ENGINE, model_name)
+                print("✅ Whisper model loaded successfully")
+            except Exception as e:
+                print(f"❌ Failed to load Whisper: {e}")
+                raise
+        return _models[model_name]
+
+def model_for_language(language: str) -> str:
+    """Model size to transcribe a given language with"""
+    return LANGUAGE_MODELS.get(language, FALLBACK_MODEL)
+
+def detect_language(audio, audio_hash: str = None) -> str:
+    """
+    Detect the spoken language from the first 30 s (cached per file hash)
+    
+    Args:
+        audio: Path to audio file, or a 16 kHz float32 array
+        audio_hash: Digest of the file if the caller already has it (arrays
+            are only cached when it is given)
+    
+    Returns:
+        Whisper language code, e.g. "en", "hi", "mr"
+    """
+    if audio_hash is None and not isinstance(audio, str):
+        return get_model().detect_language(head(load_audio(audio), WINDOW_SECONDS))[0]
+    
+    cache = get_cache()
+    key = make_key("language", audio_hash or hash_file(audio), STT_VERSION)
+    language = cache.get(key)
+    if language is not None:
+        return language
+    
+    # Same shared buffer transcription uses, so this doesn't decode twice
+    language, probability = get_model().detect_language(head(load_audio(audio), WINDOW_SECONDS))
+    print(f"🌐 Detected language: {language} ({probability:.0%})")
+    cache.set(key, language)
+    return language
 
-def get_model():
-    """Load Whisper model once (cached)"""
-    global _model
-    if _model is None:
-        print("🔊 Loading Whisper model (first time may take a minute)...")
-        try:
-            _model = whisper.load_model("base")  # Small, fast model
-            print("✅ Whisper model loaded successfully")
-        except Exception as e:
-            print(f"❌ Failed to load Whisper: {e}")
-            raise
-    return _model
+def transcribe_segments(audio, workers: int = STT_WORKERS, language: str = None) -> dict:
+    """
+    Transcribe audio and keep Whisper's segment timestamps
+    
+    Args:
+        audio: Path to audio file, or a 16 kHz mono float32 array
+        workers: >1 splits the audio at silences and transcribes chunks in a process pool
+        language: Whisper language code; detected from the first 30 s if not given
+    
+    Returns:
+        {"text": str, "language": str, "duration": seconds or None,
+         "segments": [{"start", "end", "text"}]}
+        (duration is None when a model server decoded the file instead of this process)
+    """
+    language = language or detect_language(audio)
+    
+    if workers > 1 and not server_url():
+        from app.stt.parallel_whisper import transcribe_parallel
+        buffer = load_audio(audio)
+        segments = transcribe_parallel(buffer, workers=workers, language=language)
+        return {
+            "text": " ".join(seg["text"] for seg in segments),
+            "language": language,
+            "duration": duration(buffer),
+            "segments": segments
+        }
+    
+    model = get_model(model_for_language(language))
+    print(f"📝 Transcribing ({language}): {audio if isinstance(audio, str) else 'array'}")
+    
+    # A model server on this host decodes the path itself; locally reuse the shared buffer
+    buffer = None if server_url() and isinstance(audio, str) else load_audio(audio)
+    result = model.transcribe(audio if buffer is None else buffer, language=language)
+    
+    return {
+        "text": result["text"],
+        "language": language,
+        "duration": None if buffer is None else duration(buffer),
+        "segments": [{"start": seg["start"], "end": seg["end"], "text": seg["text"]} for seg in result["segments"]]
+    }
 
-def transcribe_audio(audio_path: str) -> str:
+def transcribe_audio(audio, workers: int = STT_WORKERS, language: str = None) -> str:
     """
     Transcribe audio file using Whisper
     
     Args:
-        audio_path: Path to audio file
-        
+        audio: Path to audio file, or a 16 kHz mono float32 array
+        workers: >1 splits the audio at silences and transcribes chunks in a process pool
+        language: Whisper language code; detected from the first 30 s if not given
+    
     Returns:
         Transcribed text
     """
     try:
-        model = get_model()
-        print(f"📝 Transcribing: {audio_path}")
-        
-        # Transcribe with basic options
+        return transcribe_segments(audio, workers=workers, language=language)["text"]
+    
+    except Exception as e:
+        print(f"❌ Transcription error: {e}")
+        return f"Error in transcription: {str(e)}"
+
+def transcribe_stream(audio, window_seconds: int = WINDOW_SECONDS, language: str = None,
+                      workers: int = STT_WORKERS):
+    """
+    Transcribe audio window by window, yielding segments as they are decoded
+    
+    Windows end at the quietest point of their last SILENCE_SEARCH_SECONDS
+    (so words aren't cut at a boundary) and are at most window_seconds long.
+    
+    Args:
+        audio: Path to audio file, or a 16 kHz mono float32 array
+        window_seconds: Maximum length of each decoded window
+        language: Whisper language code; detected from the first 30 s if not given
+        workers: >1 decodes silence-split chunks in a process pool instead,
+            yielding each chunk's segments once it and the ones before are done
+    
+    Yields:
+        {"start": seconds, "end": seconds, "text": str} in call order
+    """
+    from app.stt.parallel_whisper import split_on_silence, stream_parallel
+    
+    language = language or detect_language(audio)
+    if workers > 1 and not server_url():
+        yield from stream_parallel(audio, workers=workers, language=language)
+        return
+    model = get_model(model_for_language(language))
+    print(f"📝 Streaming transcription ({language}): {audio if isinstance(audio, str) else 'array'}")
+    
+    audio = load_audio(audio)
+    search = min(SILENCE_SEARCH_SECONDS, window_seconds / 3)
+    previous_text = ""
+    
+    for start, end in split_on_silence(audio, chunk_seconds=window_seconds - search, search_seconds=search):
         result = model.transcribe(
-            audio_path,
-            language='en',  # Force English
-            fp16=False,     # Use CPU
-            verbose=False   # Don't print progress
+            audio[start:end],
+            language=language,
+            # Carry the recent transcript across window boundaries
+            initial_prompt=previous_text[-200:] or None
         )
         
-        return result.get("text", "").strip()
-        
-    except Exception as e:
-        print(f"❌ Transcription error: {e}")
-        return f"Error in transcription: {str(e)}"
\ No newline at end of file
+        base = start / SAMPLE_RATE
+        for seg in result["segments"]:
+            previous_text = f"{previous_text} {seg['text'].strip()}"[-200:]
+            yield {
+                "start": base + seg["start"],
+                "end": base + seg["end"],
+                "text": seg["text"]
+            }
@@ -0,0 +1,109 @@
+"""
+Talk-time analytics from timestamped transcript segments
+
+All numbers come from Whisper's segment timestamps plus the true audio
+duration, computed with vectorized numpy over the segment arrays.
+numpy is imported lazily.
+"""
+
+# Pauses longer than this end a monologue
+MONOLOGUE_GAP_SECONDS = 1.5
+
+# Segments shorter than this are left out of WPM (timestamps too coarse)
+MIN_WPM_SECONDS = 1.0
+
+def _arrays(segments: list):
+    import numpy as np
+    starts = np.array([seg["start"] for seg in segments], dtype=np.float64)
+    ends = np.array([seg["end"] for seg in segments], dtype=np.float64)
+    words = np.array([len(seg["text"].split()) for seg in segments], dtype=np.int64)
+    return starts, ends, words
+
+def speech_seconds(starts, ends) -> float:
+    """Total length of the union of [start, end) intervals"""
+    import numpy as np
+    if len(starts) == 0:
+        return 0.0
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], np.maximum.accumulate(ends[order])
+    # Each interval only adds the part past everything before it
+    covered_until = np.concatenate(([starts[0]], ends[:-1]))
+    return float(np.clip(ends - np.maximum(starts, covered_until), 0, None).sum())
+
+def segment_wpm(segments: list) -> list:
+    """Words per minute for each segment (None for segments too short to measure)"""
+    import numpy as np
+    if not segments:
+        return []
+    starts, ends, words = _arrays(segments)
+    seconds = ends - starts
+    wpm = np.where(seconds >= MIN_WPM_SECONDS, words / np.maximum(seconds, 1e-9) * 60, np.nan)
+    return [None if np.isnan(v) else round(float(v), 1) for v in wpm]
+
+def longest_monologue(segments: list, max_gap: float = MONOLOGUE_GAP_SECONDS) -> dict:
+    """
+    Longest stretch of consecutive segments with no pause over max_gap
+    (and, when segments carry a "speaker", no change of speaker)
+
+    Returns:
+        {"start", "end", "seconds", "speaker"} (seconds 0.0 for no segments)
+    """
+    import numpy as np
+    if not segments:
+        return {"start": 0.0, "end": 0.0, "seconds": 0.0, "speaker": None}
+
+    starts, ends, _ = _arrays(segments)
+    speakers = np.array([seg.get("speaker") for seg in segments], dtype=object)
+    breaks = np.concatenate(([True], (starts[1:] - ends[:-1] > max_gap) | (speakers[1:] != speakers[:-1])))
+    first = np.flatnonzero(breaks)
+    last = np.concatenate((first[1:] - 1, [len(segments) - 1]))
+    lengths = ends[last] - starts[first]
+    best = int(np.argmax(lengths))
+    return {
+        "start": float(starts[first[best]]),
+        "end": float(ends[last[best]]),
+        "seconds": float(lengths[best]),
+        "speaker": segments[first[best]].get("speaker"),
+    }
+
+def talk_share(segments: list) -> dict:
+    """Fraction of segment time per "speaker" ({} when segments aren't diarized)"""
+    import numpy as np
+    if not segments or segments[0].get("speaker") is None:
+        return {}
+    starts, ends, _ = _arrays(segments)
+    names, labels = np.unique(np.array([seg["speaker"] for seg in segments]), return_inverse=True)
+    talk = np.bincount(labels, weights=ends - starts)
+    total = talk.sum()
+    return {str(name): round(float(t / total), 3) if total else 0.0 for name, t in zip(names, talk)}
+
+def call_stats(segments: list, duration: float = None) -> dict:
+    """
+    Summary talk-time metrics for one call
+
+    Args:
+        segments: [{"start", "end", "text"[, "speaker"]}] in call order
+        duration: True audio length in seconds (default: last segment end)
+
+    Returns:
+        {"duration_seconds", "speech_seconds", "silence_seconds", "speech_ratio",
+         "words", "wpm", "segment_wpm", "longest_monologue", "talk_share"}
+    """
+    import numpy as np
+    starts, ends, words = _arrays(segments) if segments else (np.zeros(0), np.zeros(0), np.zeros(0, np.int64))
+    if duration is None:
+        duration = float(ends.max()) if len(ends) else 0.0
+
+    speech = min(speech_seconds(starts, ends), duration) if duration else speech_seconds(starts, ends)
+    total_words = int(words.sum())
+    return {
+        "duration_seconds": round(duration, 2),
+        "speech_seconds": round(speech, 2),
+        "silence_seconds": round(max(duration - speech, 0.0), 2),
+        "speech_ratio": round(speech / duration, 3) if duration else 0.0,
+        "words": total_words,
+        "wpm": round(total_words / speech * 60, 1) if speech else 0.0,
+        "segment_wpm": segment_wpm(segments),
+        "longest_monologue": longest_monologue(segments),
+        "talk_share": talk_share(segments),
+    }
@@ -0,0 +1,104 @@
+"""
+Thin client for the shared model server (app/server.py)
+
+Set MODEL_SERVER_URL (e.g. http://127.0.0.1:8765) and get_model()/get_llm()
+return proxies that forward to the server instead of loading models in
+this process.
+"""
+import base64
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+# Long calls can take minutes to transcribe
+TIMEOUT_SECONDS = 900
+
+# Header with the seconds the caller will wait; the server stops LLM work after that
+DEADLINE_HEADER = "X-Deadline-Seconds"
+
+def server_url():
+    """Model server base URL, or None to load models in-process"""
+    url = os.environ.get("MODEL_SERVER_URL", "").strip()
+    return url.rstrip("/") or None
+
+def post(path: str, payload: dict, deadline: float = None) -> dict:
+    """
+    POST JSON to the model server and return the decoded JSON reply
+
+    deadline: time() after which the caller gives up; the request times out
+        then and the server is told to stop at the same point
+    """
+    headers = {"Content-Type": "application/json"}
+    timeout = TIMEOUT_SECONDS
+    if deadline is not None:
+        timeout = min(timeout, max(deadline - time.time(), 0.001))
+        headers[DEADLINE_HEADER] = f"{timeout:.3f}"
+    request = urllib.request.Request(
+        server_url() + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers=headers,
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode("utf-8", "replace")
+        raise RuntimeError(f"Model server error {e.code}: {detail}") from e
+
+def encode_audio(audio) -> dict:
+    """Paths are sent absolute (same host, any cwd); arrays as base64 float32"""
+    if isinstance(audio, str):
+        return {"path": os.path.abspath(audio)}
+    import numpy as np
+    data = np.ascontiguousarray(audio, dtype=np.float32).tobytes()
+    return {"audio_b64": base64.b64encode(data).decode("ascii")}
+
+def decode_audio(payload: dict):
+    """Inverse of encode_audio (server side)"""
+    if "path" in payload:
+        return payload["path"]
+    import numpy as np
+    return np.frombuffer(base64.b64decode(payload["audio_b64"]), dtype=np.float32)
+
+class RemoteEngine:
+    """STT engine proxy with the same interface as app.stt.backends engines"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.name = "remote"
+
+    def transcribe(self, audio, language='en', initial_prompt=None) -> dict:
+        return post("/stt/transcribe", {
+            "model": self.model_name,
+            "language": language,
+            "initial_prompt": initial_prompt,
+            **encode_audio(audio)
+        })
+
+    def detect_language(self, head) -> tuple:
+        reply = post("/stt/detect_language", {"model": self.model_name, **encode_audio(head)})
+        return reply["language"], reply["probability"]
+
+class RemoteLLM:
+    """FastLLM proxy with the same generate* methods"""
+
+    def generate(self, prompt: str, max_tokens=150, stop=None, fields=None, deadline=None) -> str:
+        return post("/llm/generate", {
+            "prompt": prompt, "max_tokens": max_tokens, "stop": stop, "fields": fields
+        }, deadline)["text"]
+
+    def generate_batch(self, prompts, max_tokens=150, stop=None, fields=None, deadline=None) -> list:
+        return post("/llm/generate_batch", {
+            "prompts": list(prompts), "max_tokens": max_tokens, "stop": stop, "fields": fields
+        }, deadline)["texts"]
+
+    def generate_with_prefix(self, prefix: str, suffixes, max_tokens=150, stop=None, fields=None, deadline=None) -> list:
+        return post("/llm/generate_with_prefix", {
+            "prefix": prefix, "suffixes": list(suffixes), "max_tokens": max_tokens, "stop": stop, "fields": fields
+        }, deadline)["texts"]
+
+    def generate_fields(self, prompt: str, fields: dict, deadline=None) -> str:
+        return post("/llm/generate_fields", {"prompt": prompt, "fields": fields}, deadline)["text"]
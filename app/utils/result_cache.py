@@ -0,0 +1,168 @@
+"""
+Simple content-addressed cache for transcripts and analysis results
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.environ.get("SALES_AI_CACHE_DIR", "data/cache")
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of raw audio bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file, read in chunks (same digest as hash_bytes)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def make_key(kind: str, audio_hash: str, *versions) -> str:
+    """
+    Build a cache key from the audio hash plus model/prompt versions
+
+    Args:
+        kind: Entry type, e.g. "transcript" or "analysis"
+        audio_hash: Digest of the uploaded audio
+        versions: Anything that changes the output (model names, prompt version)
+
+    Returns:
+        Hex key safe to use as a file name
+    """
+    h = hashlib.sha256(kind.encode())
+    h.update(audio_hash.encode())
+    for v in versions:
+        h.update(b"\0")
+        h.update(str(v).encode())
+    return h.hexdigest()
+
+class ResultCache:
+    """
+    Two-tier (memory LRU + JSON files on disk) cache with size and age eviction
+
+    A file's mtime is its last use (hits touch it), so the disk budget
+    evicts least recently used entries and max_age counts from last use.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_items=64, max_disk_mb=200, max_age=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.max_age = max_age
+        self._memory = OrderedDict()  # key -> (last used, value)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str):
+        """Return cached value or None"""
+        now = time.time()
+        path = self._path(key)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                used_at, value = entry
+                if now - used_at <= self.max_age:
+                    self._memory[key] = (now, value)
+                    self._memory.move_to_end(key)
+                    _touch(path, now)
+                    return value
+                del self._memory[key]
+
+        try:
+            if now - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        _touch(path, now)
+        self._remember(key, value, now)
+        return value
+
+    def set(self, key: str, value):
+        """Store a JSON-serializable value in both tiers"""
+        self._remember(key, value, time.time())
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Cache write failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict_disk()
+
+    def _remember(self, key, value, used_at):
+        with self._lock:
+            self._memory[key] = (used_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Drop expired files, then least recently used files until under the size budget"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age:
+                _safe_remove(path)
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            _safe_remove(path)
+            total -= size
+
+    def clear(self):
+        """Remove everything from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                _safe_remove(os.path.join(self.cache_dir, name))
+
+def _touch(path, now):
+    """Mark a disk entry as just used (its mtime drives LRU eviction)"""
+    try:
+        os.utime(path, (now, now))
+    except OSError:
+        pass
+
+def _safe_remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# Global instance
+_cache = None
+
+def get_cache() -> ResultCache:
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
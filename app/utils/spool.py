@@ -0,0 +1,179 @@
+"""
+Spool directory for uploaded audio
+
+Uploads are copied in fixed-size chunks and hashed while they are written,
+so the copy adds one chunk of memory per upload. (Streamlit's
+UploadedFile is already held in memory by Streamlit itself; the spool
+avoids a second full copy and leaves a file ffmpeg can read.) Files are
+stored under their SHA-256 (same digest as result_cache.hash_bytes), which
+deduplicates repeated uploads and lets the digest double as the result
+cache key. Expired files are removed and the directory is kept under a
+size quota; files pinned with pin() while a call is being processed are
+never removed.
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+SPOOL_DIR = os.environ.get("SALES_AI_SPOOL_DIR", "data/spool")
+SPOOL_MB = float(os.environ.get("SALES_AI_SPOOL_MB", "2048"))
+
+# Long calls decoded to raw float32 for memory-mapping (app/stt/audio.py).
+# They are ~4x the size of an mp3 upload, so they get their own directory
+# and quota instead of evicting uploads.
+DECODED_DIR = os.environ.get("SALES_AI_DECODED_DIR", "data/decoded")
+DECODED_MB = float(os.environ.get("SALES_AI_DECODED_MB", "4096"))
+
+CHUNK_SIZE = 1 << 20
+
+# Files this young are never evicted for the quota (they may be about to be pinned)
+MIN_AGE_SECONDS = 600
+
+# Marker suffix for pinned files: "<name>.<pid>-<id>.pin", one per pin, so
+# pins from other processes (parallel STT workers, other replicas) count too
+PIN_SUFFIX = ".pin"
+
+class Spool:
+    """Content-addressed upload store with a size quota and TTL"""
+
+    def __init__(self, spool_dir=SPOOL_DIR, max_mb=SPOOL_MB, max_age=24 * 3600):
+        self.spool_dir = spool_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(spool_dir, exist_ok=True)
+
+    def store(self, fileobj, suffix: str = "", chunk_size: int = CHUNK_SIZE) -> tuple:
+        """
+        Copy a file-like object into the spool
+
+        Args:
+            fileobj: Readable binary file object (read from its current position)
+            suffix: Extension to keep, e.g. ".mp3" (ffmpeg sniffs the format anyway)
+
+        Returns:
+            (path, sha256 hex digest)
+
+        Raises:
+            ValueError: The upload alone is larger than the quota
+        """
+        h = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.spool_dir, f".{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as out:
+                for block in iter(lambda: fileobj.read(chunk_size), b""):
+                    size += len(block)
+                    if size > self.max_bytes:
+                        raise ValueError(f"Upload is larger than the {self.max_bytes // (1024 * 1024)} MB spool quota")
+                    h.update(block)
+                    out.write(block)
+        except BaseException:
+            _safe_remove(tmp_path)
+            raise
+
+        digest = h.hexdigest()
+        path = os.path.join(self.spool_dir, digest + suffix.lower())
+        with self._lock:
+            if os.path.exists(path):
+                # Same content already spooled: keep that copy, refresh its TTL
+                _safe_remove(tmp_path)
+                os.utime(path)
+            else:
+                os.replace(tmp_path, path)
+            self._evict()
+        return path, digest
+
+    @contextmanager
+    def pin(self, path: str):
+        """Keep a file in this spool from being evicted inside the block (no-op for other files)"""
+        path = os.path.realpath(path)
+        if os.path.dirname(path) != os.path.realpath(self.spool_dir):
+            yield
+            return
+        marker = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}{PIN_SUFFIX}"
+        open(marker, "w").close()
+        try:
+            yield
+        finally:
+            _safe_remove(marker)
+
+    def _evict(self):
+        """Drop expired files and stale partial writes, then oldest files until under quota"""
+        now = time.time()
+        names = os.listdir(self.spool_dir)
+        pinned = set()
+        for name in names:
+            if name.endswith(PIN_SUFFIX):
+                marker = os.path.join(self.spool_dir, name)
+                try:
+                    stale = now - os.stat(marker).st_mtime > self.max_age
+                except OSError:
+                    continue
+                if stale:
+                    _safe_remove(marker)  # Left behind by a crashed process
+                else:
+                    pinned.add(name[:-len(PIN_SUFFIX)].rsplit(".", 1)[0])
+
+        entries, pinned_bytes = [], 0
+        for name in names:
+            if name.endswith(PIN_SUFFIX):
+                continue
+            path = os.path.join(self.spool_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if name in pinned:
+                pinned_bytes += st.st_size  # In use: counts toward the quota, never removed
+                continue
+            age = now - st.st_mtime
+            if name.endswith(".tmp"):
+                if age > MIN_AGE_SECONDS:
+                    _safe_remove(path)  # Left behind by a crashed upload
+                continue
+            if age > self.max_age:
+                _safe_remove(path)
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = pinned_bytes + sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if now - mtime < MIN_AGE_SECONDS:
+                print(f"⚠️ Spool over quota ({total / (1024 * 1024):.0f} MB), all remaining files are in use")
+                break
+            _safe_remove(path)
+            total -= size
+
+    def gc(self):
+        """Run expiry and quota eviction now"""
+        with self._lock:
+            self._evict()
+
+def _safe_remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# Global instances
+_spool = None
+_decoded = None
+
+def get_spool() -> Spool:
+    global _spool
+    if _spool is None:
+        _spool = Spool()
+    return _spool
+
+def get_decoded_spool() -> Spool:
+    """Store for decoded-audio memmaps (own directory and quota)"""
+    global _decoded
+    if _decoded is None:
+        _decoded = Spool(DECODED_DIR, DECODED_MB)
+    return _decoded
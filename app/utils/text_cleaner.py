@@ -1,30 +1,89 @@
 """
 Simple text cleaning utilities
+
+Special characters are dropped and whitespace collapsed with C-level
+passes (re.sub + str.split/join), fixes are literal substitutions, and
+the only Python callback runs on lowercase sentence starts.
+SegmentCleaner applies the same rules to Whisper segments as they arrive.
 """
 import re
 
+# Bump whenever the cleaning rules change (part of the transcript cache key)
+CLEANER_VERSION = "2"
+
+# Common transcription errors (matched on whole words)
+REPLACEMENTS = {
+    "what's up": "whatsapp",
+    "whats up": "whatsapp",
+    "i'm": "I'm",
+    "i": "I",
+}
+
+# Everything except word characters, whitespace and punctuation is dropped.
+# Python's \w misses combining marks, so Indic blocks (Devanagari matras,
+# viramas, danda ...) and combining diacritics are kept explicitly.
+_SPECIAL = re.compile(r"[^\w\s.,!?'\"\-\u0300-\u036f\u0900-\u0dff]")
+
+# (pattern, replacement), longest phrase first. Whitespace is already single
+# spaces when these run, so a leading space marks a word start.
+_FIXES = [
+    (re.compile(" " + re.escape(phrase) + r"(?![\w'-])"), " " + REPLACEMENTS[phrase].replace("\\", r"\\"))
+    for phrase in sorted(REPLACEMENTS, key=len, reverse=True)
+]
+
+# Sentence break followed by a letter that isn't already uppercase
+_SENTENCE_START = re.compile(r"[.!?] [^\W\d_A-Z]")
+
+def _upper(m) -> str:
+    return m.group().upper()
+
+def _clean(text: str) -> str:
+    # Leading space lets the fixes see a word start at the very beginning
+    text = " " + " ".join(_SPECIAL.sub("", text).split())
+    for pattern, replacement in _FIXES:
+        text = pattern.sub(replacement, text)
+    return _SENTENCE_START.sub(_upper, text)[1:]
+
+def _capitalize_first(text: str) -> str:
+    return text[:1].upper() + text[1:]
+
 def clean_text(text: str) -> str:
     """
     Clean transcript text
     """
     if not text:
         return ""
-    
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove special characters but keep punctuation
-    text = re.sub(r'[^\w\s.,!?\'"-]', '', text)
-    
-    # Fix common transcription errors
-    text = text.replace("what's up", "whatsapp")
-    text = text.replace("whats up", "whatsapp")
-    text = text.replace(" i ", " I ")
-    text = text.replace(" i'm ", " I'm ")
-    
-    # Capitalize sentences
-    sentences = text.split('. ')
-    sentences = [s.strip().capitalize() for s in sentences if s.strip()]
-    text = '. '.join(sentences)
-    
-    return text.strip()
\ No newline at end of file
+
+    text = _clean(text)
+
+    # Capitalize the first sentence (later ones are handled by the pattern)
+    return _capitalize_first(text)
+
+class SegmentCleaner:
+    """Clean Whisper segments one at a time, carrying sentence state across them"""
+
+    def __init__(self):
+        self.sentence_start = True
+
+    def feed(self, segment: str) -> str:
+        """Return the cleaned segment ("" if nothing is left)"""
+        text = _clean(segment)
+        if not text:
+            return ""
+        if self.sentence_start:
+            text = _capitalize_first(text)
+        self.sentence_start = text[-1] in ".!?"
+        return text
+
+def clean_segments(segments):
+    """
+    Clean an iterable of segment texts incrementally
+
+    Yields:
+        Cleaned, non-empty segment texts (join with " " for the full transcript)
+    """
+    cleaner = SegmentCleaner()
+    for segment in segments:
+        text = cleaner.feed(segment)
+        if text:
+            yield text
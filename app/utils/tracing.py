@@ -0,0 +1,194 @@
+"""
+Per-stage latency spans
+
+    with call_context(call_id):
+        with span("stt.transcribe", audio_seconds=42.0):
+            ...
+
+Every finished span is kept in a bounded per-name window for p50/p95
+(render_prometheus() / summary()) and, if TRACE_FILE is set, appended to
+that JSONL file. Spans carry the call ID and the enclosing span's name, so
+a slow call can be split into STT, cleaning and LLM time afterwards:
+
+    python -m app.utils.tracing trace.jsonl [--call CALL_ID]
+"""
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+TRACE_FILE = os.environ.get("TRACE_FILE")
+
+# Durations kept per span name for percentiles
+WINDOW = 1000
+
+_call_id = contextvars.ContextVar("call_id", default=None)
+_parent = contextvars.ContextVar("parent_span", default=None)
+
+_durations = defaultdict(lambda: deque(maxlen=WINDOW))
+_totals = defaultdict(lambda: [0, 0.0])  # name -> [count, sum seconds]
+_lock = threading.Lock()
+
+# TRACE_FILE lines are written outside _lock so slow disks don't stall
+# summary() or other threads' record(); _write_lock only orders the lines
+_trace_out = None
+_write_lock = threading.Lock()
+
+@contextmanager
+def call_context(call_id: str, parent: str = None):
+    """Tag every span recorded inside the block with call_id (and a parent span name)"""
+    token = _call_id.set(call_id)
+    parent_token = _parent.set(parent) if parent else None
+    try:
+        yield
+    finally:
+        if parent_token is not None:
+            _parent.reset(parent_token)
+        _call_id.reset(token)
+
+def current() -> dict:
+    """Call ID and enclosing span of the running code (to hand to other threads)"""
+    return {"call_id": _call_id.get(), "parent": _parent.get()}
+
+def bind(fn):
+    """Wrap fn so it runs with the caller's call ID and parent span in another thread"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+def record(name: str, seconds: float, call_id: str = None, parent: str = None, **attrs):
+    """Record an already-measured duration"""
+    entry = {
+        "name": name,
+        "call_id": call_id or _call_id.get(),
+        "parent": parent or _parent.get(),
+        "end": time.time(),
+        "seconds": round(seconds, 6),
+        **attrs
+    }
+    with _lock:
+        _durations[name].append(seconds)
+        totals = _totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+    if TRACE_FILE:
+        _write(json.dumps(entry) + "\n")
+    return entry
+
+def _write(line: str):
+    global _trace_out
+    with _write_lock:
+        if _trace_out is None:
+            _trace_out = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)  # Line-buffered
+        _trace_out.write(line)
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time the block; the yielded dict can be filled with more attributes
+    (e.g. token counts) before the block ends
+    """
+    token = _parent.set(name)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _parent.reset(token)
+        record(name, time.perf_counter() - start, status=status, **attrs)
+
+def _quantile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def summary() -> dict:
+    """{span name: {"count", "sum", "p50", "p95"}} (percentiles over the last WINDOW spans)"""
+    with _lock:
+        return {
+            name: {
+                "count": _totals[name][0],
+                "sum": _totals[name][1],
+                "p50": _quantile(values, 0.5),
+                "p95": _quantile(values, 0.95),
+            }
+            for name, values in _durations.items()
+        }
+
+def render_prometheus() -> str:
+    """Span durations in Prometheus text exposition format (summary type)"""
+    lines = [
+        "# HELP sales_ai_span_seconds Duration of pipeline stages",
+        "# TYPE sales_ai_span_seconds summary",
+    ]
+    for name, stats in sorted(summary().items()):
+        label = f'span="{name}"'
+        lines.append(f'sales_ai_span_seconds{{{label},quantile="0.5"}} {stats["p50"]:.6f}')
+        lines.append(f'sales_ai_span_seconds{{{label},quantile="0.95"}} {stats["p95"]:.6f}')
+        lines.append(f"sales_ai_span_seconds_sum{{{label}}} {stats['sum']:.6f}")
+        lines.append(f"sales_ai_span_seconds_count{{{label}}} {stats['count']}")
+    return "\n".join(lines) + "\n"
+
+_metrics_server = None
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Serve render_prometheus() on http://host:port/metrics from a daemon thread (once)"""
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    _metrics_server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return _metrics_server
+
+def load_trace(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main():
+    """Print p50/p95 per span name from a trace file (or one call's spans with --call)"""
+    args = sys.argv[1:]
+    if not args:
+        print("Usage: python -m app.utils.tracing TRACE.jsonl [--call CALL_ID]")
+        return
+    entries = load_trace(args[0])
+
+    if "--call" in args:
+        call_id = args[args.index("--call") + 1]
+        for entry in sorted((e for e in entries if e["call_id"] == call_id), key=lambda e: e["end"]):
+            extra = {k: v for k, v in entry.items() if k not in ("name", "call_id", "parent", "end", "seconds")}
+            print(f"{entry['name']:<24}{entry['seconds']:>9.3f}s  parent={entry['parent']}  {extra}")
+        return
+
+    by_name = defaultdict(list)
+    for entry in entries:
+        by_name[entry["name"]].append(entry["seconds"])
+    print(f"{'span':<24}{'count':>7}{'p50 s':>10}{'p95 s':>10}{'total s':>10}")
+    for name, values in sorted(by_name.items()):
+        print(f"{name:<24}{len(values):>7}{_quantile(values, 0.5):>10.3f}{_quantile(values, 0.95):>10.3f}{sum(values):>10.1f}")
+
+if __name__ == "__main__":
+    main()
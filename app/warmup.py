@@ -0,0 +1,81 @@
+"""
+Model preloading and warm-up
+
+Loads Whisper (every model size a detected language can be routed to)
+and the LLM once per process and runs a tiny inference on each so lazy
+kernel/allocator initialization happens before the first real call. Run
+directly to see load and warm-up timings:
+
+    python -m app.warmup
+
+The Streamlit app warms up in the background in its own process;
+SALES_AI_WARMUP=0 turns that off (models then load on first use).
+"""
+import os
+import threading
+import time
+
+# Background warm-up in the serving process (read by start_background_warmup)
+WARMUP = os.environ.get("SALES_AI_WARMUP", "1") != "0"
+
+# Timings from the last warm-up in this process (seconds)
+timings = {}
+
+_started = False
+_start_lock = threading.Lock()
+
+def warm_up(stt: bool = True, llm: bool = True) -> dict:
+    """
+    Load the models and run one dummy inference on each
+
+    Returns:
+        {"whisper_<size>_load": s, "whisper_<size>_warmup": s, ..., "llm_load": s, "llm_warmup": s}
+    """
+    if stt:
+        import numpy as np
+        from app.stt.simple_whisper import FALLBACK_MODEL, LANGUAGE_MODELS, MODEL_NAME, SAMPLE_RATE, get_model
+
+        # Language ID model first, then the sizes hi/mr/unknown languages are routed to
+        for name in dict.fromkeys([MODEL_NAME, *LANGUAGE_MODELS.values(), FALLBACK_MODEL]):
+            start = time.time()
+            model = get_model(name)
+            timings[f"whisper_{name}_load"] = time.time() - start
+
+            start = time.time()
+            model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), language="en")  # 1 s of silence
+            timings[f"whisper_{name}_warmup"] = time.time() - start
+
+    if llm:
+        from app.agents.fast_llm import get_llm, run_llm
+
+        start = time.time()
+        get_llm()
+        timings["llm_load"] = time.time() - start
+
+        start = time.time()
+        run_llm("Hello", max_tokens=2)
+        timings["llm_warmup"] = time.time() - start
+
+    print("🔥 Warm-up: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items()))
+    return dict(timings)
+
+def start_background_warmup() -> threading.Thread:
+    """Warm up in a daemon thread (once per process, unless WARMUP is off) so the UI stays responsive"""
+    global _started
+    with _start_lock:
+        if _started or not WARMUP:
+            return None
+        _started = True
+
+    def _run():
+        try:
+            warm_up()
+        except Exception as e:
+            print(f"❌ Warm-up failed: {e}")
+
+    thread = threading.Thread(target=_run, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == "__main__":
+    warm_up()
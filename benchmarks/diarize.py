@@ -0,0 +1,65 @@
+"""
+Measure diarization speed and speaker split on the sample calls
+
+Usage: python benchmarks/diarize.py [--minutes 60] [--segment-seconds 6]
+
+Diarization needs segment timestamps but not a transcript, so the audio is
+cut into fixed-length pseudo-segments and Whisper is not loaded. Each
+sample is also tiled up to --minutes to check that long calls stay well
+faster than real time. Prints MFCC time, the real-time factor of the
+whole diarize() step (lower is better, 1.0 = as long as the audio) and
+the resulting talk share (or "unlabeled" when the split was rejected).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+SAMPLES = sorted((ROOT / "data" / "uploads").glob("*.mp3"))
+
+def pseudo_segments(seconds: float, segment_seconds: float) -> list:
+    count = max(1, int(seconds // segment_seconds))
+    return [{"start": i * segment_seconds, "end": min((i + 1) * segment_seconds, seconds), "text": ""}
+            for i in range(count)]
+
+def measure(name: str, audio, segment_seconds: float):
+    from app.stt.audio import duration
+    from app.stt.diarize import diarize, mfcc
+    from app.utils.call_stats import talk_share
+
+    seconds = duration(audio)
+    segments = pseudo_segments(seconds, segment_seconds)
+
+    start = time.perf_counter()
+    mfcc(audio)
+    mfcc_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labeled = diarize(audio, segments)
+    total = time.perf_counter() - start
+
+    share = talk_share(labeled)
+    print(f"{name:<22}{seconds / 60:>8.1f}{mfcc_seconds:>9.2f}{total:>9.2f}"
+          f"{total / seconds:>9.4f}   " + (", ".join(f"{s} {v:.0%}" for s, v in share.items()) or "unlabeled (speakers not separable)"))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=60, help="Length of the tiled long-call case")
+    parser.add_argument("--segment-seconds", type=float, default=6, help="Pseudo-segment length")
+    args = parser.parse_args()
+
+    import numpy as np
+    from app.stt.audio import SAMPLE_RATE, load_audio
+
+    print(f"{'case':<22}{'min':>8}{'mfcc s':>9}{'total s':>9}{'RTF':>9}   talk share")
+    for path in SAMPLES:
+        audio = load_audio(str(path))
+        measure(path.stem, audio, args.segment_seconds)
+        repeats = int(np.ceil(args.minutes * 60 * SAMPLE_RATE / max(len(audio), 1)))
+        measure(f"{path.stem} x{repeats}", np.tile(audio, repeats), args.segment_seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Import-time guard for the Streamlit landing page
+
+Usage: python benchmarks/import_time.py [--budget SECONDS]
+
+Imports every app module that app/main.py imports at the top level in a
+fresh interpreter, prints the wall time and fails (exit 1) if torch,
+transformers or whisper got pulled in or the budget is exceeded.
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+HEAVY_MODULES = ["torch", "transformers", "whisper", "faster_whisper", "librosa"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def landing_imports() -> list:
+    """app.* modules imported at module level by app/main.py (incl. inside try blocks)"""
+    tree = ast.parse((ROOT / "app" / "main.py").read_text(encoding="utf-8"))
+    modules = []
+    nodes = list(tree.body)
+    while nodes:
+        node = nodes.pop(0)
+        if isinstance(node, ast.Try):
+            nodes[:0] = node.body
+        elif isinstance(node, ast.ImportFrom) and node.module and node.module.startswith("app."):
+            modules.append(node.module)
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=1.0, help="Max seconds for the imports")
+    args = parser.parse_args()
+
+    modules = landing_imports()
+    probe = PROBE.format(modules=modules, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"📦 {len(modules)} modules imported in {result['seconds'] * 1000:.0f} ms")
+    failed = False
+    if result["heavy"]:
+        print(f"❌ Heavy modules imported at startup: {', '.join(result['heavy'])}")
+        failed = True
+    if result["seconds"] > args.budget:
+        print(f"❌ Over budget ({args.budget:.2f}s)")
+        failed = True
+    if not failed:
+        print("✅ Landing page imports are light")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
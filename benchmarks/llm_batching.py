@@ -0,0 +1,67 @@
+"""
+Measure LLM throughput under concurrent callers, with and without batching
+
+Usage: python benchmarks/llm_batching.py [--users 4] [--prompts 3] [--max-tokens 40]
+
+Each simulated user sends its prompts one after another through run_llm.
+Runs once with LLM_MAX_BATCH=1 (every prompt alone) and once with the
+scheduler's default batch size, and prints wall time, prompts/s and
+approximate generated tokens/s for each.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+PROMPT = "Sales call transcript:\n\nCustomer {n}: The price seems high, I need to talk to my manager.\n\nSummarize the objection:"
+
+def run(users: int, prompts: int, max_tokens: int):
+    from app.agents.fast_llm import get_llm, get_scheduler, run_llm
+
+    tokenizer = get_llm().pipe.tokenizer
+    run_llm("Hello", max_tokens=2)  # Warm-up
+
+    def user(u):
+        return [run_llm(PROMPT.format(n=u * prompts + i), max_tokens) for i in range(prompts)]
+
+    start = time.time()
+    with ThreadPoolExecutor(users) as pool:
+        outputs = [text for texts in pool.map(user, range(users)) for text in texts]
+    elapsed = time.time() - start
+
+    tokens = sum(len(tokenizer(text)["input_ids"]) for text in outputs)
+    stats = get_scheduler().stats()
+    print(
+        f"max_batch={os.environ['LLM_MAX_BATCH']:<4}{elapsed:>8.1f}s{len(outputs) / elapsed:>10.2f} prompts/s"
+        f"{tokens / elapsed:>10.1f} tok/s   avg batch {stats['avg_batch']:.1f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--prompts", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=40)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run(args.users, args.prompts, args.max_tokens)
+
+    # Separate processes so each run gets a fresh scheduler with its own settings
+    for max_batch in ("1", os.environ.get("LLM_MAX_BATCH", "8")):
+        env = dict(os.environ, LLM_MAX_BATCH=max_batch)
+        env.pop("MODEL_SERVER_URL", None)
+        subprocess.run(
+            [sys.executable, __file__, "--child", "--users", str(args.users),
+             "--prompts", str(args.prompts), "--max-tokens", str(args.max_tokens)],
+            env=env, check=True
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare LLM load modes on the bundled sample calls
+
+Usage: python benchmarks/llm_precision.py [mode ...]   (default: fp32 bf16 int8)
+
+Transcribes data/uploads/*.mp3 once, then runs the agents on every
+transcript in a fresh process per mode. Prints load time, peak RSS,
+seconds per call and agreement with the fp32 results (same sentiment,
+call type and score; word overlap of the summaries).
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+SAMPLES = sorted((ROOT / "data" / "uploads").glob("*.mp3"))
+DEFAULT_MODES = ["fp32", "bf16", "int8"]
+
+def run_mode(transcripts_path: str, out_path: str):
+    """Child process: load the LLM in LLM_PRECISION mode and analyze every transcript"""
+    from app.agents.fast_llm import get_llm
+    from app.agents.simple_orchestrator import run_agents
+
+    start = time.time()
+    get_llm()
+    load_seconds = time.time() - start
+
+    with open(transcripts_path, "r", encoding="utf-8") as f:
+        transcripts = json.load(f)
+
+    results = {}
+    call_seconds = []
+    for name, transcript in transcripts.items():
+        start = time.time()
+        results[name] = run_agents(transcript)
+        call_seconds.append(time.time() - start)
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "load_seconds": load_seconds,
+            "call_seconds": sum(call_seconds) / len(call_seconds),
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "results": results,
+        }, f)
+
+def _overlap(a: str, b: str) -> float:
+    a, b = set(a.lower().split()), set(b.lower().split())
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+def agreement(reference: dict, results: dict) -> float:
+    """Share of compared fields that match the reference (summaries scored by word overlap)"""
+    scores = []
+    fields = (("transcript_analysis", "sentiment"), ("transcript_analysis", "call_type"), ("coaching_feedback", "score"))
+    for name, ref in reference.items():
+        got = results[name]
+        for agent, field in fields:
+            scores.append(float(ref[agent].get(field) == got[agent].get(field)))
+        summary = ref["transcript_analysis"].get("summary", "")
+        scores.append(_overlap(summary, got["transcript_analysis"].get("summary", "")))
+    return sum(scores) / len(scores) if scores else 0.0
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        return run_mode(sys.argv[2], sys.argv[3])
+
+    from app.stt.simple_whisper import transcribe_audio
+
+    modes = sys.argv[1:] or DEFAULT_MODES
+    tmp = Path(tempfile.mkdtemp(prefix="llm_precision_"))
+    transcripts_path = tmp / "transcripts.json"
+    transcripts = {path.name: transcribe_audio(str(path)) for path in SAMPLES}
+    transcripts_path.write_text(json.dumps(transcripts), encoding="utf-8")
+
+    runs = {}
+    for mode in modes:
+        out_path = tmp / f"{mode}.json"
+        env = dict(os.environ, LLM_PRECISION=mode)
+        env.pop("MODEL_SERVER_URL", None)
+        subprocess.run([sys.executable, __file__, "--child", str(transcripts_path), str(out_path)], env=env, check=True)
+        runs[mode] = json.loads(out_path.read_text(encoding="utf-8"))
+
+    reference = runs.get("fp32", next(iter(runs.values())))["results"]
+    print(f"\n{'mode':<8}{'load s':>9}{'peak RSS MB':>13}{'s/call':>9}{'agreement':>11}")
+    for mode, run in runs.items():
+        print(
+            f"{mode:<8}{run['load_seconds']:>9.1f}{run['peak_rss_mb']:>13.0f}"
+            f"{run['call_seconds']:>9.1f}{agreement(reference, run['results']):>11.0%}"
+        )
+
+if __name__ == "__main__":
+    main()
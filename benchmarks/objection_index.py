@@ -0,0 +1,95 @@
+"""
+Precision / recall of the objection keyword pre-filter
+
+Usage: python benchmarks/objection_index.py [--taxonomy taxonomy.json] [--min-precision 0.9]
+
+Runs the index over customer turns in the style of the sample calls, each
+labeled with the objection it raises (or None), and prints precision and
+recall per type. Neutral turns that mention fees, timing or safety without
+pushing back are there to catch over-broad patterns. Exits non-zero when
+overall precision is below --min-precision.
+"""
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agents.objection_index import ObjectionIndex, load_taxonomy
+
+# (customer turn, objection type or None)
+SAMPLES = [
+    ("Honestly this is too expensive for me right now.", "Price"),
+    ("I can't afford another five thousand every month.", "Price"),
+    ("That premium is way out of my budget.", "Price"),
+    ("The charges seem too high compared to what I pay today.", "Price"),
+    ("It's a bit pricey for a term plan.", "Price"),
+    ("Are there any hidden charges in this?", "Price"),
+    ("Please call me later, I'm driving.", "Timing"),
+    ("Not right now, maybe next month.", "Timing"),
+    ("I am really busy this week.", "Timing"),
+    ("Let me think about it and get back to you.", "Timing"),
+    ("I don't have time for this today.", "Timing"),
+    ("I need to discuss it with my wife first.", "Authority"),
+    ("It's not my decision, my father handles the investments.", "Authority"),
+    ("I will have to check with my manager.", "Authority"),
+    ("We already have a policy with another company.", "Competitor"),
+    ("My bank is offering a better rate on fixed deposits.", "Competitor"),
+    ("Why should I switch from my current plan?", "Competitor"),
+    ("I'm not sure about this plan, it sounds risky.", "Trust"),
+    ("How safe is my money with you?", "Trust"),
+    ("Last time I had a bad experience with an agent.", "Trust"),
+    ("Is there any guarantee on the returns?", "Trust"),
+    ("This sounds like a scam to me.", "Trust"),
+    ("What are the fees for the first year?", None),
+    ("Okay, and the charges are deducted monthly?", None),
+    ("I'll send the documents later today.", None),
+    ("Sorry, I was busy with a customer, go ahead.", None),
+    ("The price looks fine, how do I pay?", None),
+    ("My wife and I want to start saving for our daughter.", None),
+    ("Yes, I keep my savings in a safe place.", None),
+    ("Sure, that works for me.", None),
+    ("I am not sure I heard you, can you repeat?", None),
+    ("Can you share the details on whatsapp?", None),
+    ("What is the cost of the rider?", None),
+    ("My budget is about ten thousand a month.", None),
+    ("Next week I'll be back in the city, we can meet then.", None),
+    ("The returns are guaranteed by the bank, right? Good.", None),
+]
+
+def evaluate(index: ObjectionIndex) -> dict:
+    """{type: Counter(tp, fp, fn)} plus "all" over SAMPLES"""
+    counts = {"all": Counter()}
+    for text, expected in SAMPLES:
+        found = {hit["type"] for hit in index.find(text)}
+        for objection_type in found | ({expected} if expected else set()):
+            c = counts.setdefault(objection_type, Counter())
+            outcome = "tp" if objection_type == expected and objection_type in found else (
+                "fp" if objection_type in found else "fn")
+            c[outcome] += 1
+            counts["all"][outcome] += 1
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Objection index precision")
+    parser.add_argument("--taxonomy", help="JSON taxonomy to evaluate instead of the default")
+    parser.add_argument("--min-precision", type=float, default=0.9)
+    args = parser.parse_args()
+
+    index = ObjectionIndex(load_taxonomy(args.taxonomy) if args.taxonomy else None)
+    counts = evaluate(index)
+
+    print(f"{'type':<12}{'precision':>10}{'recall':>8}{'tp':>5}{'fp':>5}{'fn':>5}")
+    for objection_type, c in sorted(counts.items(), key=lambda kv: kv[0] == "all"):
+        precision = c["tp"] / max(c["tp"] + c["fp"], 1)
+        recall = c["tp"] / max(c["tp"] + c["fn"], 1)
+        print(f"{objection_type:<12}{precision:>10.0%}{recall:>8.0%}{c['tp']:>5}{c['fp']:>5}{c['fn']:>5}")
+
+    total = counts["all"]
+    precision = total["tp"] / max(total["tp"] + total["fp"], 1)
+    print(f"{'✅' if precision >= args.min_precision else '❌'} precision {precision:.0%} on {len(SAMPLES)} turns")
+    sys.exit(0 if precision >= args.min_precision else 1)
+
+if __name__ == "__main__":
+    main()
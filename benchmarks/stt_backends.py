@@ -0,0 +1,44 @@
+"""
+Compare STT engines on the bundled sample calls
+
+Usage: python benchmarks/stt_backends.py [engine ...]
+
+Prints load time and real-time factor (processing seconds / audio seconds,
+lower is better) per engine and file.
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.stt.backends import ENGINES, available_engines, load_engine
+from app.stt.simple_whisper import MODEL_NAME, SAMPLE_RATE
+
+SAMPLES = sorted((Path(__file__).parent.parent / "data" / "uploads").glob("*.mp3"))
+
+def main():
+    from app.stt.audio import load_audio
+
+    engines = sys.argv[1:] or available_engines()
+    audio = {path.name: load_audio(str(path)) for path in SAMPLES}
+
+    print(f"{'engine':<16}{'file':<14}{'audio s':>9}{'time s':>9}{'RTF':>8}")
+    for name in engines:
+        if name not in ENGINES or name not in available_engines():
+            print(f"⚠️ Skipping {name} (not available)")
+            continue
+
+        start = time.time()
+        engine = load_engine(name, MODEL_NAME)
+        print(f"{name:<16}{'(load)':<14}{'':>9}{time.time() - start:>9.1f}")
+
+        for file_name, samples in audio.items():
+            seconds = len(samples) / SAMPLE_RATE
+            start = time.time()
+            engine.transcribe(samples, language='en')
+            elapsed = time.time() - start
+            print(f"{name:<16}{file_name:<14}{seconds:>9.1f}{elapsed:>9.1f}{elapsed / seconds:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Scaling of parallel Whisper transcription with the number of workers
+
+Usage: python benchmarks/stt_parallel.py [--workers 1 2 4] [--minutes 10]
+
+Each sample call is tiled up to --minutes (short calls are a single chunk
+and can't scale) and transcribed with transcribe_parallel() at every
+worker count. The pool for each count is warmed up on a short clip
+first, so process start and model loading aren't timed. Prints the
+real-time factor (processing seconds / audio seconds, lower is better),
+the speedup over the first worker count and the parallel efficiency
+(speedup / worker ratio; 100% is linear scaling). Same as running the
+app with SALES_AI_STT_WORKERS=N.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+SAMPLES = sorted((ROOT / "data" / "uploads").glob("*.mp3"))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--minutes", type=float, default=10, help="Length each sample is tiled up to")
+    args = parser.parse_args()
+
+    import numpy as np
+    from app.stt.audio import SAMPLE_RATE, load_audio
+    from app.stt.parallel_whisper import shutdown_pools, transcribe_parallel
+    from app.stt.simple_whisper import detect_language
+
+    print(f"{'case':<22}{'workers':>8}{'min':>7}{'time s':>9}{'RTF':>8}{'speedup':>9}{'eff':>7}")
+    for path in SAMPLES:
+        audio = load_audio(str(path))
+        language = detect_language(str(path))
+        repeats = int(np.ceil(args.minutes * 60 * SAMPLE_RATE / max(len(audio), 1)))
+        long_call = np.tile(audio, repeats)
+        seconds = len(long_call) / SAMPLE_RATE
+
+        base = None
+        for workers in args.workers:
+            # A few short chunks per worker start every process and load its model
+            transcribe_parallel(long_call[:workers * 30 * SAMPLE_RATE], workers=workers,
+                                chunk_seconds=20, language=language)
+            start = time.perf_counter()
+            transcribe_parallel(long_call, workers=workers, language=language)
+            elapsed = time.perf_counter() - start
+
+            base = base or (workers, elapsed)
+            speedup = base[1] / elapsed
+            efficiency = speedup / (workers / base[0])
+            print(f"{path.stem + f' x{repeats}':<22}{workers:>8}{seconds / 60:>7.1f}{elapsed:>9.1f}"
+                  f"{elapsed / seconds:>8.3f}{speedup:>8.2f}x{efficiency:>7.0%}")
+    shutdown_pools()
+
+if __name__ == "__main__":
+    main()
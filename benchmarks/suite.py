@@ -0,0 +1,286 @@
+"""
+Reproducible performance suite over the bundled sample calls
+
+Usage:
+    python benchmarks/suite.py --save benchmarks/baseline.json
+    python benchmarks/suite.py --compare benchmarks/baseline.json [--tolerance 0.15]
+
+Cases are data/uploads/*.mp3 plus synthetic longer calls made by
+concatenating them. Three phases run per case, each in a fresh process
+(so the first call is a true cold start and peak RSS is per phase):
+
+    stt      decode + language ID + Whisper        RTF, cold/warm seconds
+    agents   run_agents on the phase-1 transcript  tokens/s, cold/warm seconds
+    e2e      StreamingCall + run_agents (UI path)  cold/warm seconds
+
+Runs offline on CPU: Hugging Face downloads are disabled and CUDA is
+hidden, so models must already be in the local caches. --compare exits
+with status 1 if any metric is worse than the baseline by more than the
+tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+SAMPLES = sorted((ROOT / "data" / "uploads").glob("*.mp3"))
+PHASES = ("stt", "agents", "e2e")
+
+# Synthetic long calls: name -> sample file stems to concatenate
+SYNTHETIC = {
+    "mixed_concat": ["english", "hindi", "marathi"],
+    "english_x4": ["english"] * 4,
+}
+
+# Metric -> True if higher is better (everything else: lower is better)
+HIGHER_IS_BETTER = {"tokens_per_s": True}
+
+OFFLINE_ENV = {"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1", "CUDA_VISIBLE_DEVICES": ""}
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _decode_tokens(trace_path: str) -> tuple:
+    """Sum new tokens and decode seconds of the llm.decode spans in a trace file"""
+    tokens, seconds = 0, 0.0
+    with open(trace_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["name"] == "llm.decode":
+                tokens += entry.get("new_tokens", 0)
+                seconds += entry["seconds"]
+    return tokens, seconds
+
+def _timed(fn, repeats: int) -> tuple:
+    """(first call seconds, best of the following repeats, last result)"""
+    start = time.perf_counter()
+    result = fn()
+    cold = time.perf_counter() - start
+    warm = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        warm.append(time.perf_counter() - start)
+    return cold, min(warm) if warm else None, result
+
+def run_phase(phase: str, case: dict, repeats: int) -> dict:
+    """Child process: measure one phase on one case"""
+    from app.utils import tracing
+
+    metrics = {}
+    if phase == "stt":
+        from app.stt.audio import load_audio
+        from app.stt.simple_whisper import SAMPLE_RATE, WINDOW_SECONDS, get_model, model_for_language
+
+        def stt():
+            audio = load_audio(case["path"])
+            language, _ = get_model().detect_language(audio[:SAMPLE_RATE * WINDOW_SECONDS])
+            return len(audio) / SAMPLE_RATE, get_model(model_for_language(language)).transcribe(audio, language=language)
+
+        cold, warm, (audio_seconds, result) = _timed(stt, repeats)
+        metrics.update({
+            "audio_seconds": round(audio_seconds, 2),
+            "rtf": (warm or cold) / audio_seconds,
+            "transcript": result["text"],
+        })
+
+    elif phase == "agents":
+        from app.agents.simple_orchestrator import run_agents
+
+        # Greedy decoding, so every run generates the same tokens
+        cold, warm, _ = _timed(lambda: run_agents(case["transcript"]), repeats)
+        tokens, seconds = _decode_tokens(tracing.TRACE_FILE)
+        metrics.update({
+            "new_tokens": tokens // (repeats + 1),
+            "tokens_per_s": tokens / seconds if seconds else 0.0,
+        })
+
+    else:
+        cold, warm, _ = _timed(lambda: _ui_call(case["path"]), repeats)
+
+    metrics.update({
+        "cold_seconds": cold,
+        "warm_seconds": warm,
+        "peak_rss_mb": _peak_rss_mb(),
+        # Per-stage p50s from the trace spans, e.g. to see model load vs inference
+        "spans_p50": {name: stats["p50"] for name, stats in tracing.summary().items()},
+    })
+    return metrics
+
+def _ui_call(path: str) -> dict:
+    """app/main.py's upload path (StreamingCall, then run_agents) minus the widgets and result cache"""
+    from app.agents.simple_orchestrator import run_agents
+    from app.pipeline import StreamingCall
+
+    call = StreamingCall(path)
+    try:
+        for _ in call.transcribe():
+            pass
+        transcript, _ = call.finish()
+        return run_agents(transcript, precomputed=call.early_results())
+    finally:
+        call.close()
+
+def _write_wav(path: Path, audio):
+    import numpy as np
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(pcm.tobytes())
+
+def build_cases(tmp: Path) -> dict:
+    """{case name: {"path"}} for the samples and the synthetic concatenations"""
+    import numpy as np
+    from app.stt.audio import load_audio
+
+    cases = {path.stem: {"path": str(path)} for path in SAMPLES}
+    decoded = {}
+    for name, parts in SYNTHETIC.items():
+        if not all(part in cases for part in parts):
+            continue
+        for part in parts:
+            if part not in decoded:
+                decoded[part] = load_audio(cases[part]["path"])
+        path = tmp / f"{name}.wav"
+        _write_wav(path, np.concatenate([decoded[part] for part in parts]))
+        cases[name] = {"path": str(path)}
+    return cases
+
+def run_suite(repeats: int, phases=PHASES) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="bench_suite_"))
+    cases = build_cases(tmp)
+    env = dict(os.environ, **OFFLINE_ENV)
+    env.pop("MODEL_SERVER_URL", None)  # Measure in-process models
+
+    results = {phase: {} for phase in phases}
+    for phase in phases:
+        for name, case in cases.items():
+            if phase == "agents":
+                transcript = results.get("stt", {}).get(name, {}).get("transcript")
+                if not transcript:
+                    from app.stt.simple_whisper import transcribe_audio
+                    transcript = transcribe_audio(case["path"])
+                case = dict(case, transcript=transcript)
+
+            case_path, out_path = tmp / f"{phase}_{name}_case.json", tmp / f"{phase}_{name}.json"
+            case_path.write_text(json.dumps(case), encoding="utf-8")
+            # Own trace file and an empty result cache per run (no cached language IDs)
+            child_env = dict(
+                env,
+                TRACE_FILE=str(tmp / f"{phase}_{name}.trace.jsonl"),
+                SALES_AI_CACHE_DIR=str(tmp / f"cache_{phase}_{name}")
+            )
+            Path(child_env["TRACE_FILE"]).touch()
+
+            print(f"⏱️ {phase} / {name}...", flush=True)
+            subprocess.run(
+                [sys.executable, __file__, "--child", phase, str(case_path), str(out_path), "--repeats", str(repeats)],
+                env=child_env, check=True
+            )
+            results[phase][name] = json.loads(out_path.read_text(encoding="utf-8"))
+
+    return {"meta": _meta(repeats), "results": results}
+
+def _meta(repeats: int) -> dict:
+    from app.agents.fast_llm import DEFAULT_MODEL, PRECISION
+    from app.stt.simple_whisper import STT_VERSION
+
+    meta = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "stt": STT_VERSION,
+        "llm": DEFAULT_MODEL,
+        "llm_precision": PRECISION,
+        "repeats": repeats,
+    }
+    try:
+        import torch
+        meta["torch"] = torch.__version__
+        meta["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return meta
+
+def _numeric(metrics: dict) -> dict:
+    return {k: v for k, v in metrics.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Rows of (phase, case, metric, baseline, current, change, regressed)"""
+    rows = []
+    for phase, cases in current["results"].items():
+        for name, metrics in cases.items():
+            base = baseline["results"].get(phase, {}).get(name)
+            if base is None:
+                continue
+            for metric, value in _numeric(metrics).items():
+                old = _numeric(base).get(metric)
+                if not old or metric in ("audio_seconds", "new_tokens"):
+                    continue
+                change = (value - old) / old
+                worse = -change if HIGHER_IS_BETTER.get(metric) else change
+                rows.append((phase, name, metric, old, value, change, worse > tolerance))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark STT, agents and end-to-end on the sample calls")
+    parser.add_argument("--save", help="Write results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression (0.15 = 15%%)")
+    parser.add_argument("--repeats", type=int, default=1, help="Warm runs after the cold one")
+    parser.add_argument("--phases", nargs="+", choices=PHASES, default=list(PHASES))
+    parser.add_argument("--child", nargs=3, metavar=("PHASE", "CASE", "OUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        phase, case_path, out_path = args.child
+        with open(case_path, "r", encoding="utf-8") as f:
+            case = json.load(f)
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(run_phase(phase, case, args.repeats), f)
+        return
+
+    current = run_suite(args.repeats, args.phases)
+
+    print(f"\n{'phase':<8}{'case':<14}{'cold s':>9}{'warm s':>9}{'RTF':>7}{'tok/s':>8}{'RSS MB':>9}")
+    for phase, cases in current["results"].items():
+        for name, m in cases.items():
+            warm = f"{m['warm_seconds']:.1f}" if m.get("warm_seconds") is not None else "-"
+            rtf = f"{m['rtf']:.2f}" if "rtf" in m else "-"
+            tps = f"{m['tokens_per_s']:.1f}" if "tokens_per_s" in m else "-"
+            print(f"{phase:<8}{name:<14}{m['cold_seconds']:>9.1f}{warm:>9}{rtf:>7}{tps:>8}{m['peak_rss_mb']:>9.0f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Saved {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, current, args.tolerance)
+        regressions = [row for row in rows if row[-1]]
+        print(f"\nvs {args.compare} (tolerance {args.tolerance:.0%}):")
+        for phase, name, metric, old, new, change, regressed in rows:
+            mark = "  ❌ regression" if regressed else ""
+            print(f"{phase:<8}{name:<14}{metric:<14}{old:>10.2f}{new:>10.2f}{change:>+8.0%}{mark}")
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s)")
+            sys.exit(1)
+        print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Text cleaner micro-benchmark
+
+Usage: python benchmarks/text_cleaner.py [--mb SIZE] [--check]
+
+Compares clean_text with the previous implementation on a synthetic
+transcript and reports MB/s. --check instead verifies the output matches
+the previous cleaner on shuffled sample sentences (up to case, which the
+old capitalize() mangled, and the double spaces it left behind), that
+clean_segments agrees with clean_text, and a few known regressions.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.utils.text_cleaner import clean_segments, clean_text
+
+# Whisper-like text: single spaces, punctuation, few special characters
+CLEAN_SAMPLE = ("So I was saying that the plan is good. We can share details on whatsapp and i think "
+                "you will like it. The returns are around eight percent per year, right? Okay, thank you. ")
+
+# Noisy text: double spaces, newlines, special characters on every line
+NOISY_SAMPLE = ("so  i was saying, what's up with the pricing?  i'm not sure it's worth it... "
+                "we can share details on whats up. the plan costs 5,000 per month (approx) & "
+                "includes  support.\n okay thank you! ")
+
+def legacy_clean_text(text: str) -> str:
+    """The original two re.sub + four replace + split/capitalize/join cleaner"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?\'"-]', '', text)
+    text = text.replace("what's up", "whatsapp")
+    text = text.replace("whats up", "whatsapp")
+    text = text.replace(" i ", " I ")
+    text = text.replace(" i'm ", " I'm ")
+    sentences = text.split('. ')
+    sentences = [s.strip().capitalize() for s in sentences if s.strip()]
+    text = '. '.join(sentences)
+    return text.strip()
+
+# Inputs the previous cleaner got wrong -> expected output
+EXPECTED = {
+    "cost is $500 & more": "Cost is 500 more",
+    "नमस्ते। आप कैसे हैं?": "नमस्ते। आप कैसे हैं?",
+    "i think i'm fine. what's up? i. ok": "I think I'm fine. Whatsapp? I. Ok",
+}
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def check(trials: int = 500, seed: int = 0) -> bool:
+    """Compare against the previous cleaner; print mismatches"""
+    rng = random.Random(seed)
+    sentences = [s + " " for s in re.split(r"(?<=[.!?]) ", CLEAN_SAMPLE + NOISY_SAMPLE) if s.strip()]
+    failures = 0
+    for text, expected in EXPECTED.items():
+        if clean_text(text) != expected:
+            failures += 1
+            print(f"❌ {text!r}: {clean_text(text)!r} != {expected!r}")
+    for _ in range(trials):
+        picked = rng.choices(sentences, k=rng.randint(1, 12))
+        text = "".join(picked).strip()  # The old cleaner drops a final ". "
+        new, old = clean_text(text), legacy_clean_text(text)
+        if _normalize(new) != _normalize(old):
+            failures += 1
+            print(f"❌ legacy mismatch on {text!r}:\n  {new!r}\n  {old!r}")
+        streamed = " ".join(clean_segments(picked))
+        if streamed != new:
+            failures += 1
+            print(f"❌ clean_segments mismatch on {text!r}:\n  {streamed!r}\n  {new!r}")
+    print(f"{'✅' if not failures else '❌'} {len(EXPECTED) + trials} cases, {failures} mismatches")
+    return not failures
+
+def measure(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text.encode("utf-8")) / best / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Text cleaner throughput")
+    parser.add_argument("--mb", type=float, default=4.0, help="Synthetic transcript size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="Check output against the previous cleaner")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check() else 1)
+
+    for name, sample in (("clean", CLEAN_SAMPLE), ("noisy", NOISY_SAMPLE)):
+        text = sample * max(1, int(args.mb * 1e6 / len(sample)))
+        segments = [sample] * (len(text) // len(sample))
+
+        print(f"📏 {len(text) / 1e6:.1f} MB {name} transcript")
+        print(f"  legacy clean_text : {measure(legacy_clean_text, text, args.repeat):7.1f} MB/s")
+        print(f"  clean_text        : {measure(clean_text, text, args.repeat):7.1f} MB/s")
+        print(f"  clean_segments    : {measure(lambda _: list(clean_segments(segments)), text, args.repeat):7.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,16 @@ One-click runner for Sales Call Analyzer
 import subprocess
 import sys
 import os
+import importlib.util
 
 def check_installation():
-    """Check if required packages are installed"""
+    """Check if required packages are installed (without importing them)"""
     required = ["streamlit", "torch", "transformers", "whisper"]
     
     for package in required:
-        try:
-            __import__(package)
+        if importlib.util.find_spec(package) is not None:
             print(f"✅ {package}")
-        except ImportError:
+        else:
             print(f"❌ {package}")
             return False
     
@@ -37,9 +37,17 @@ def main():
     # Create necessary directories
     os.makedirs("data/uploads", exist_ok=True)
     
+    # Models load in the Streamlit process (a warm-up here would be thrown
+    # away); it warms up in the background unless --no-warmup is given
+    env = dict(os.environ)
+    if "--no-warmup" in sys.argv:
+        env["SALES_AI_WARMUP"] = "0"
+    
     print("\n✅ All dependencies checked")
     print("\n🚀 Starting web interface...")
     print("🌐 Open http://localhost:8501 in your browser")
+    if env.get("SALES_AI_WARMUP", "1") != "0":
+        print("🔥 Models warm up in the background once the page first loads")
     print("🛑 Press Ctrl+C to stop")
     print("=" * 50)
     
@@ -51,7 +59,7 @@ def main():
             "--server.address=0.0.0.0",
             "--browser.gatherUsageStats=false",
             "--theme.base=light"
-        ])
+        ], env=env)
     except KeyboardInterrupt:
         print("\n👋 Shutting down...")
     except Exception as e: